@@ -1,59 +1,169 @@
 """
 Code analysis endpoints
 """
-from fastapi import APIRouter, HTTPException
-from app.models.core import AnalysisRequest, AnalysisResult
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Optional
+import orjson
+from app.models.core import (
+    AnalysisRequest,
+    AnalysisResult,
+    AnalysisSummary,
+    BatchAnalysisRequest,
+    BatchAnalysisResult,
+)
 from app.parsers.cpp_analyzer import CppAnalyzer
-from app.api.files import uploaded_files
-from app.api.rag import rag_documents
+from app.api.dependencies import get_analyzer, get_file_store, get_rag_service
+from app.services.file_store import FileEntry, FileStore
+from app.services.rag_service import RAGService
 
 router = APIRouter()
 
-# Initialize analyzer
-analyzer = CppAnalyzer()
-
 
 @router.post("/analyze", response_model=AnalysisResult)
-async def analyze_code(request: AnalysisRequest):
+async def analyze_code(
+    request: AnalysisRequest,
+    include_stats: bool = False,
+    analyzer: CppAnalyzer = Depends(get_analyzer),
+    rag_service: RAGService = Depends(get_rag_service),
+    file_store: FileStore = Depends(get_file_store)
+):
     """
     Analyze uploaded C++ file for style violations
 
     This endpoint will:
     1. Retrieve the file from storage
     2. Retrieve the style guide from RAG storage
-    3. Run basic C++ analysis (text-based heuristics)
+    3. Run basic C++ analysis (text-based heuristics), unless the same
+       content was recently analyzed with the same style guide
     4. Return violations with details
+
+    violations_by_severity and violations_by_type are left empty unless
+    include_stats=true is passed, since they can be computed from the
+    violations list.
+    """
+    file_data = _get_file_or_404(request.file_id, file_store)
+    style_guide_data = _get_style_guide_or_404(request.style_guide_id, rag_service)
+
+    # Clients can derive the breakdowns from the violations list themselves,
+    # so they are only counted when asked for
+    try:
+        return await _analyze(analyzer, file_data, style_guide_data, request.use_rag, include_stats)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+
+@router.post("/analyze/stream")
+async def analyze_code_stream(
+    request: AnalysisRequest,
+    analyzer: CppAnalyzer = Depends(get_analyzer),
+    rag_service: RAGService = Depends(get_rag_service),
+    file_store: FileStore = Depends(get_file_store)
+):
+    """
+    Analyze uploaded C++ file, streaming violations as NDJSON
+
+    Each line is a JSON object: {"event": "violation", "data": {...}} for every
+    violation as soon as it is found, then a final {"event": "summary", "data":
+    {...}} with the totals and status. The rule-based violations arrive without
+    waiting for the LLM step.
+    """
+    file_data = _get_file_or_404(request.file_id, file_store)
+    style_guide_data = _get_style_guide_or_404(request.style_guide_id, rag_service)
+
+    return StreamingResponse(
+        _stream_ndjson(analyzer, file_data, style_guide_data, request.use_rag),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.post("/analyze/batch", response_model=BatchAnalysisResult)
+async def analyze_batch(
+    request: BatchAnalysisRequest,
+    analyzer: CppAnalyzer = Depends(get_analyzer),
+    rag_service: RAGService = Depends(get_rag_service),
+    file_store: FileStore = Depends(get_file_store)
+):
+    """
+    Analyze several uploaded C++ files against one style guide
+
+    Files are analyzed concurrently and results are returned in request
+    order. A file that fails to analyze gets an error result rather than
+    failing the whole batch.
     """
-    # Retrieve uploaded file
-    if request.file_id not in uploaded_files:
-        raise HTTPException(status_code=404, detail=f"File not found: {request.file_id}")
+    files = [_get_file_or_404(file_id, file_store) for file_id in request.file_ids]
+    style_guide_data = _get_style_guide_or_404(request.style_guide_id, rag_service)
+
+    results = await analyzer.analyze_files(
+        [(file_data.content, file_data.name, file_data.name) for file_data in files],
+        style_guide=style_guide_data["content"],
+        use_rag=request.use_rag,
+        style_guide_hash=style_guide_data["content_hash"]
+    )
+
+    return BatchAnalysisResult(results=results)
+
+
+def _get_file_or_404(file_id: str, file_store: FileStore) -> FileEntry:
+    """Retrieve an uploaded file"""
+    file_data = file_store.get(file_id)
+    if file_data is None:
+        raise HTTPException(status_code=404, detail=f"File not found: {file_id}")
+    return file_data
 
-    file_data = uploaded_files[request.file_id]
-    file_content = file_data["content"]
-    file_name = file_data["name"]
 
-    # Retrieve style guide
-    if not request.style_guide_id:
+def _get_style_guide_or_404(style_guide_id: Optional[str], rag_service: RAGService) -> dict:
+    """Retrieve a style guide from RAG storage"""
+    if not style_guide_id:
         raise HTTPException(status_code=400, detail="Style guide ID is required")
 
-    if request.style_guide_id not in rag_documents:
-        raise HTTPException(status_code=404, detail=f"Style guide not found: {request.style_guide_id}")
+    style_guide_data = rag_service.get_document(style_guide_id)
+    if style_guide_data is None:
+        raise HTTPException(status_code=404, detail=f"Style guide not found: {style_guide_id}")
+    return style_guide_data
 
-    style_guide_data = rag_documents[request.style_guide_id]
-    style_guide_content = style_guide_data["content"]
 
-    # Run analysis
-    try:
-        result = await analyzer.analyze_file(
-            file_content=file_content,
-            file_name=file_name,
-            file_path=file_name,  # Use filename as path for MVP
-            style_guide=style_guide_content,
-            use_rag=request.use_rag
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+async def _analyze(
+    analyzer: CppAnalyzer,
+    file_data: FileEntry,
+    style_guide_data: dict,
+    use_rag: bool,
+    include_stats: bool
+) -> AnalysisResult:
+    """Analyze one file (the analyzer reuses cached results for unchanged content)"""
+    return await analyzer.analyze_file(
+        file_content=file_data.content,
+        file_name=file_data.name,
+        file_path=file_data.name,  # Use filename as path for MVP
+        style_guide=style_guide_data["content"],
+        use_rag=use_rag,
+        style_guide_hash=style_guide_data["content_hash"],
+        include_stats=include_stats
+    )
+
+
+async def _stream_ndjson(
+    analyzer: CppAnalyzer,
+    file_data: FileEntry,
+    style_guide_data: dict,
+    use_rag: bool
+) -> AsyncIterator[bytes]:
+    """Stream one file's analysis as NDJSON"""
+    async for item in analyzer.stream_analysis(
+        file_content=file_data.content,
+        file_name=file_data.name,
+        file_path=file_data.name,  # Use filename as path for MVP
+        style_guide=style_guide_data["content"],
+        use_rag=use_rag,
+        style_guide_hash=style_guide_data["content_hash"]
+    ):
+        event = "summary" if isinstance(item, AnalysisSummary) else "violation"
+        yield _ndjson_frame(event, item.model_dump(mode="json"))
+
+
+def _ndjson_frame(event: str, data: dict) -> bytes:
+    """One line of the NDJSON analysis stream"""
+    return orjson.dumps({"event": event, "data": data}) + b"\n"
 
 
 @router.get("/results/{analysis_id}")
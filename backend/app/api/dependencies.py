@@ -0,0 +1,28 @@
+"""
+Shared service dependencies for API route handlers
+"""
+from fastapi import Request
+from app.parsers.cpp_analyzer import CppAnalyzer
+from app.services.file_store import FileStore
+from app.services.ollama_service import OllamaService
+from app.services.rag_service import RAGService
+
+
+def get_analyzer(request: Request) -> CppAnalyzer:
+    """Analyzer created at application startup"""
+    return request.app.state.analyzer
+
+
+def get_rag_service(request: Request) -> RAGService:
+    """RAG service created at application startup"""
+    return request.app.state.rag_service
+
+
+def get_ollama_service(request: Request) -> OllamaService:
+    """Ollama client created at application startup"""
+    return request.app.state.ollama_service
+
+
+def get_file_store(request: Request) -> FileStore:
+    """Uploaded file storage created at application startup"""
+    return request.app.state.file_store
@@ -1,21 +1,33 @@
 """
 File upload and management endpoints
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
-from typing import List, Optional
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Form
+from typing import Optional, Tuple
 import os
 import uuid
+from app.api.dependencies import get_file_store
+from app.models.core import FileListResponse, FileUploadResponse
+from app.services.file_store import FileStore
+from app.utils.hashing import new_hasher
+from app.utils.uploads import read_upload
 
 router = APIRouter()
 
-# Temporary file storage (in-memory for MVP, will be improved)
-uploaded_files = {}
+# /list response with the store revision it was built from, rebuilt only
+# after an upload, delete or eviction
+_list_cache: Optional[Tuple[int, FileListResponse]] = None
 
+# Supported C++ file extensions
+_EXTENSION_LIST = [ext.strip().lower() for ext in os.getenv("SUPPORTED_EXTENSIONS", ".cpp,.hpp,.h").split(",")]
+ALLOWED_EXTENSIONS = frozenset(_EXTENSION_LIST)
+UNSUPPORTED_TYPE_MESSAGE = f"Unsupported file type. Allowed: {', '.join(_EXTENSION_LIST)}"
 
-@router.post("/upload")
+
+@router.post("/upload", response_model=FileUploadResponse)
 async def upload_file(
     file: UploadFile = File(...),
-    relative_path: Optional[str] = Form(None)
+    relative_path: Optional[str] = Form(None),
+    file_store: FileStore = Depends(get_file_store)
 ):
     """
     Upload a single C++ file for analysis
@@ -24,25 +36,16 @@ async def upload_file(
     Supported extensions: .cpp, .hpp, .h
     """
     # Validate file extension
-    allowed_extensions = {".cpp", ".hpp", ".h"}
-    file_ext = os.path.splitext(file.filename)[1].lower()
-
-    if file_ext not in allowed_extensions:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unsupported file type. Allowed: {', '.join(allowed_extensions)}"
-        )
-
-    # Read file content
-    content = await file.read()
-
-    # Check file size (max 10MB as per specs)
-    max_size = 10 * 1024 * 1024  # 10MB
-    if len(content) > max_size:
-        raise HTTPException(
-            status_code=400,
-            detail="File size exceeds 10MB limit"
-        )
+    dot = file.filename.rfind(".")
+    file_ext = file.filename[dot:].lower() if dot >= 0 else ""
+
+    if file_ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=UNSUPPORTED_TYPE_MESSAGE)
+
+    # Read file content in chunks (max 10MB as per specs)
+    hasher = new_hasher()
+    content = await read_upload(file, hasher=hasher)
+    content_hash = hasher.hexdigest()
 
     # Generate unique file ID
     file_id = str(uuid.uuid4())
@@ -50,58 +53,55 @@ async def upload_file(
     # Use relative_path if provided, otherwise just use filename
     display_path = relative_path if relative_path else file.filename
 
-    # Store file (in-memory for MVP)
-    uploaded_files[file_id] = {
-        "id": file_id,
-        "name": file.filename,
-        "path": display_path,  # Full path with directory structure
-        "content": content.decode("utf-8"),
-        "size": len(content)
-    }
-
-    return {
-        "id": file_id,
-        "file_id": file_id,  # Alias for compatibility
-        "file_name": file.filename,
-        "filename": file.filename,  # Alias for compatibility
-        "file_path": display_path,  # Path with directory structure
-        "file_size": len(content),
-        "status": "uploaded"
-    }
+    # Store file (in-memory unless a shared backend is configured)
+    file_store.put(
+        file_id=file_id,
+        name=file.filename,
+        path=display_path,
+        content=content,
+        content_hash=content_hash
+    )
+
+    return FileUploadResponse(
+        id=file_id,
+        file_name=file.filename,
+        file_path=display_path,
+        file_size=len(content)
+    )
+
+
+@router.get("/list", response_model=FileListResponse)
+async def list_files(file_store: FileStore = Depends(get_file_store)):
+    """Get list of all uploaded files with directory structure"""
+    global _list_cache
 
+    revision = file_store.revision
+    if _list_cache is None or _list_cache[0] != revision:
+        _list_cache = (revision, FileListResponse(files=file_store.list()))
 
-@router.get("/list")
-async def list_files():
-    """Get list of all uploaded files with directory structure"""
-    return {
-        "files": [
-            {
-                "id": fid,
-                "file_id": fid,  # Alias for compatibility
-                "file_name": fdata["name"],
-                "filename": fdata["name"],  # Alias for compatibility
-                "file_path": fdata.get("path", fdata["name"]),  # Full path with directory
-                "file_size": fdata["size"]
-            }
-            for fid, fdata in uploaded_files.items()
-        ]
-    }
+    return _list_cache[1]
 
 
 @router.get("/{file_id}")
-async def get_file(file_id: str):
+async def get_file(file_id: str, file_store: FileStore = Depends(get_file_store)):
     """Get file content by ID"""
-    if file_id not in uploaded_files:
+    entry = file_store.get(file_id)
+    if entry is None:
         raise HTTPException(status_code=404, detail="File not found")
 
-    return uploaded_files[file_id]
+    return {
+        "id": entry.id,
+        "name": entry.name,
+        "path": entry.path,
+        "content": entry.content.decode("utf-8"),
+        "size": entry.size
+    }
 
 
 @router.delete("/{file_id}")
-async def delete_file(file_id: str):
+async def delete_file(file_id: str, file_store: FileStore = Depends(get_file_store)):
     """Delete uploaded file"""
-    if file_id not in uploaded_files:
+    if not file_store.delete(file_id):
         raise HTTPException(status_code=404, detail="File not found")
 
-    del uploaded_files[file_id]
     return {"status": "deleted", "file_id": file_id}
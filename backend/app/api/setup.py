@@ -1,33 +1,88 @@
 """
 System setup and configuration endpoints
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from dataclasses import asdict, dataclass
+from typing import Optional, Tuple
+import asyncio
 import os
+import time
+from app.api.dependencies import get_ollama_service
 from app.services.ollama_service import OllamaService
 
 router = APIRouter()
 
 
-@router.post("/check")
-async def check_system():
-    """
-    Check if Ollama and CodeLlama are properly installed and configured
-    """
-    ollama_host = os.getenv("OLLAMA_HOST", "http://localhost:11434")
-    ollama_model = os.getenv("OLLAMA_MODEL", "codellama:7b")
+@dataclass(frozen=True, slots=True)
+class SystemConfig:
+    """System configuration, resolved from the environment once"""
+    ollama_host: str
+    ollama_model: str
+    max_file_size_mb: str
+    rag_enabled: bool
+    temperature: str
+
+    @classmethod
+    def from_env(cls) -> "SystemConfig":
+        return cls(
+            ollama_host=os.getenv("OLLAMA_HOST", "http://localhost:11434"),
+            ollama_model=os.getenv("OLLAMA_MODEL", "codellama:7b"),
+            max_file_size_mb=os.getenv("MAX_FILE_SIZE_MB", "10"),
+            rag_enabled=True,
+            temperature=os.getenv("OLLAMA_TEMPERATURE", "0.3")
+        )
+
+
+# Environment doesn't change after startup
+_config = SystemConfig.from_env()
+_config_response = asdict(_config)
+
+# Ollama status is reused briefly so a polling client doesn't probe Ollama on every request
+OLLAMA_STATUS_TTL = 5.0
+_ollama_status: Tuple[float, bool, bool] = (float("-inf"), False, False)
+# Probe in flight, if any; concurrent requests share it instead of each probing
+_ollama_probe: Optional["asyncio.Task[Tuple[bool, bool]]"] = None
+
+
+async def _get_ollama_status(ollama_service: OllamaService) -> Tuple[bool, bool]:
+    """Return (ollama_running, model_available), probing Ollama at most once per TTL"""
+    global _ollama_probe
+
+    checked_at, ollama_running, model_available = _ollama_status
+    if time.monotonic() - checked_at < OLLAMA_STATUS_TTL:
+        return ollama_running, model_available
+
+    if _ollama_probe is None or _ollama_probe.done():
+        _ollama_probe = asyncio.create_task(_probe_ollama(ollama_service))
+    # Shielded so one client disconnecting doesn't cancel the others' probe
+    return await asyncio.shield(_ollama_probe)
+
+
+async def _probe_ollama(ollama_service: OllamaService) -> Tuple[bool, bool]:
+    """Check actual Ollama connectivity and remember the result"""
+    global _ollama_status
 
-    # Check actual Ollama connectivity
-    ollama_service = OllamaService()
     ollama_running = await ollama_service.check_connection()
     model_available = False
-    
+
     if ollama_running:
         model_available = await ollama_service.check_model()
 
+    _ollama_status = (time.monotonic(), ollama_running, model_available)
+    return ollama_running, model_available
+
+
+@router.post("/check")
+async def check_system(ollama_service: OllamaService = Depends(get_ollama_service)):
+    """
+    Check if Ollama and CodeLlama are properly installed and configured
+    """
+    ollama_running, model_available = await _get_ollama_status(ollama_service)
+
     return {
         "ollama_configured": True,
-        "ollama_host": ollama_host,
-        "ollama_model": ollama_model,
+        "ollama_host": _config.ollama_host,
+        "ollama_model": _config.ollama_model,
         "ollama_running": ollama_running,
         "model_available": model_available,
         "status": "ready" if (ollama_running and model_available) else "not_ready",
@@ -50,10 +105,5 @@ async def get_configuration():
     """
     Get current system configuration
     """
-    return {
-        "ollama_host": os.getenv("OLLAMA_HOST", "http://localhost:11434"),
-        "ollama_model": os.getenv("OLLAMA_MODEL", "codellama:7b"),
-        "max_file_size_mb": os.getenv("MAX_FILE_SIZE_MB", "10"),
-        "rag_enabled": True,
-        "temperature": os.getenv("OLLAMA_TEMPERATURE", "0.3")
-    }
+    return _config_response
+
@@ -1,21 +1,50 @@
 """
 Main FastAPI application entry point for Code Style Grader
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
+import logging
 import os
 
 # Load environment variables
 load_dotenv()
 
+# Analysis progress is logged at INFO and per-step detail at DEBUG; the level
+# only applies to this app's loggers, not to libraries such as httpx
+logging.basicConfig(format="%(message)s")
+logging.getLogger("app").setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
 # Import routers
 from app.api import files, analysis, setup, rag
+from app.parsers.cpp_analyzer import CppAnalyzer
+from app.services.file_store import create_file_store
+from app.services.ollama_service import OllamaService
+from app.services.rag_service import RAGService
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared services once per worker, after the process has started"""
+    app.state.file_store = create_file_store()
+    app.state.rag_service = RAGService()
+    app.state.ollama_service = OllamaService()
+    app.state.analyzer = CppAnalyzer(
+        rag_service=app.state.rag_service,
+        ollama_service=app.state.ollama_service
+    )
+    yield
+    app.state.analyzer.close()
+
 
 app = FastAPI(
     title="Code Style Grader API",
     description="AI-powered C++ code analysis system",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse  # Faster encoding for large analysis results
 )
 
 # Configure CORS for local frontend
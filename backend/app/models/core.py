@@ -1,8 +1,8 @@
 """
 Core data models for Code Style Grader
 """
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from pydantic import BaseModel, Field, computed_field
+from typing import Any, List, Optional, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -51,14 +51,100 @@ class AnalysisRequest(BaseModel):
     use_rag: bool = False
 
 
-class AnalysisResult(BaseModel):
-    """Analysis results for a single file"""
+class AnalysisSummary(BaseModel):
+    """Analysis outcome for a single file, without the violations (final frame of a streamed analysis)"""
     file_name: str
     file_path: Optional[str] = None
     timestamp: datetime = Field(default_factory=datetime.utcnow)
-    violations: List[Violation]
     total_violations: int
     violations_by_severity: Dict[str, int]
     violations_by_type: Dict[str, int]
     status: str = "success"
     error_message: Optional[str] = None
+    # Phase timings of the run that produced this result, e.g.
+    # {"spans": {"rules": 1.2, "total": 3.4}} (milliseconds)
+    metrics: Optional[Dict[str, Any]] = None
+
+
+class AnalysisResult(AnalysisSummary):
+    """Analysis results for a single file"""
+    violations: List[Violation]
+
+
+class BatchAnalysisRequest(BaseModel):
+    """Request to analyze several files with the same style guide"""
+    file_ids: List[str]
+    style_guide_id: Optional[str] = None
+    use_rag: bool = False
+
+
+class BatchAnalysisResult(BaseModel):
+    """Analysis results for several files, in request order"""
+    results: List[AnalysisResult]
+
+
+class FileInfo(BaseModel):
+    """Uploaded file metadata returned by the files API"""
+    id: str
+    file_name: str
+    file_path: str  # Full path with directory structure
+    file_size: int
+
+    # Aliases for compatibility, only emitted on the wire
+    @computed_field
+    @property
+    def file_id(self) -> str:
+        return self.id
+
+    @computed_field
+    @property
+    def filename(self) -> str:
+        return self.file_name
+
+
+class FileUploadResponse(FileInfo):
+    """Response for a successful file upload"""
+    status: str = "uploaded"
+
+
+class FileListResponse(BaseModel):
+    """All uploaded files"""
+    files: List[FileInfo]
+
+
+class RAGDocumentInfo(BaseModel):
+    """RAG document metadata returned by the RAG API"""
+    id: str
+    filename: str
+    type: str
+
+    # Aliases for compatibility, only emitted on the wire
+    @computed_field
+    @property
+    def doc_id(self) -> str:
+        return self.id
+
+    @computed_field
+    @property
+    def name(self) -> str:
+        return self.filename
+
+    @computed_field
+    @property
+    def doc_type(self) -> str:
+        return self.type
+
+
+class RAGUploadResponse(RAGDocumentInfo):
+    """Response for a successful RAG document upload"""
+    status: str = "uploaded"
+
+    @computed_field
+    @property
+    def document_id(self) -> str:
+        return self.id
+
+
+class RAGDocumentListResponse(BaseModel):
+    """All documents in the RAG knowledge base"""
+    documents: List[RAGDocumentInfo]
@@ -1,14 +1,140 @@
 """
 Main C++ code analyzer combining tree-sitter and LLM analysis
 """
+import asyncio
+import itertools
+import logging
+import multiprocessing
 import re
-from typing import Callable, Dict, List, Optional, Tuple
-from app.models.core import ViolationSeverity, Violation, AnalysisResult  # updated import
+import sys
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
+from app.models.core import ViolationSeverity, Violation, AnalysisResult, AnalysisSummary  # updated import
 from app.parsers.cpp_parser import TreeSitterParser
 from app.services.ollama_service import OllamaService
-from app.services.rag_service import RAGService
 from app.services.style_guide_service import StyleGuideProcessor
+from app.utils.hashing import content_hash
 from datetime import datetime
+import os
+import time
+import numpy as np
+
+if TYPE_CHECKING:
+    # Imported lazily: rule check worker processes import this module and
+    # shouldn't load chromadb and sentence_transformers
+    from app.services.rag_service import RAGService
+
+logger = logging.getLogger(__name__)
+
+# Prefixes of a stripped comment line, as tuples for a single startswith() call
+COMMENT_PREFIXES = ('//', '/*', '*')
+COMMENT_OR_DIRECTIVE_PREFIXES = COMMENT_PREFIXES + ('#',)
+
+# Patterns used by the built-in checks, compiled once at import
+BRACE_SAME_LINE_RE = re.compile(r'(if|else|for|while|switch|class|struct)\s*\([^)]*\)\s*\{')
+TYPE_BRACE_SAME_LINE_RE = re.compile(r'(class|struct)\s+\w+\s*\{')
+BLOCK_KEYWORD_RE = re.compile(r'(if|else|for|while|switch|class|struct)')
+BRACELESS_KEYWORD_RE = re.compile(r'^\s*(if|else\s+if|for|while)\s*\(')
+BRACELESS_KEYWORD_PREFIXES = ('if', 'else', 'for', 'while')
+PAREN_RE = re.compile(r'[()]')
+NEW_ASSIGN_RE = re.compile(r'(\w+)\s*=\s*new\s+')
+NEW_ARRAY_RE = re.compile(r'new\s+\w+\[')
+DELETE_ARRAY_RE = re.compile(r'delete\s*\[\s*\]?\s*(\w+)')
+DELETE_RE = re.compile(r'delete\s+(\w+)')
+CLASS_NAME_RE = re.compile(r'\bclass\s+([a-zA-Z_]\w*)')
+PASCAL_CASE_RE = re.compile(r'^[A-Z][a-zA-Z0-9]*$')
+FUNCTION_CALL_RE = re.compile(r'\b([a-z_]\w*)\s*\([^)]*\)\s*[{;]')
+NUMBER_LITERAL_RE = re.compile(r'\b(\d+\.?\d*)\b')
+NULL_RE = re.compile(r'\bNULL\b')
+
+# Patterns used by the rule-text checks
+TRAILING_WS_RE = re.compile(r"[ \t]+$")
+CONTROL_HEADER_RE = re.compile(r"^\s*(if|for|while|switch|class|struct|namespace|template|try|catch|do|else|enum)\b.*[^;]$")
+FUNC_DECL_RE = re.compile(r"^\s*([A-Za-z_][A-Za-z0-9_:<>~\s*&]+)\s+([A-Za-z_][A-Za-z0-9_:<>~]*)\s*\([^;]*\)\s*(const\s*)?(\w*\s*)?$")
+BRACE_ONLY_RE = re.compile(r"^\s*{\s*$")
+INT_RE = re.compile(r"(\d+)")
+
+# Rule-text checks in match order: a rule maps to the first check where every
+# keyword group shares a word or two-word phrase with the rule's text
+RULE_WORD_RE = re.compile(r"[a-z&]+")
+RULE_CHECK_TABLE = (
+    ("no_tabs", (
+        frozenset({"tab", "tabs"}),
+        frozenset({"tabs", "no tab", "indent", "indents", "indented", "indenting", "indentation"}),
+    )),
+    ("trailing_whitespace", (
+        frozenset({"trailing whitespace", "trailing spaces"}),
+    )),
+    ("line_length", (
+        frozenset({"line length"}),
+    )),
+    ("opening_brace_same_line", (
+        frozenset({"brace", "braces"}),
+        frozenset({"same line", "k&r", "opening brace", "opening braces"}),
+    )),
+    ("file_header_comment", (
+        frozenset({"file header", "header comment", "header comments", "file comment", "file comments"}),
+    )),
+)
+
+
+
+@lru_cache(maxsize=256)
+def _loop_header_number_re(num: str) -> re.Pattern:
+    """Matches a for/while header containing the given literal"""
+    return re.compile(r'(for|while)\s*\([^)]*' + num)
+
+
+@lru_cache(maxsize=256)
+def _subscript_number_re(num: str) -> re.Pattern:
+    """Matches the given literal used as an array size or index"""
+    return re.compile(r'\[' + num + r'\]')
+
+
+# Whole results kept for recently analyzed (file, style guide, use_rag) combinations
+RESULT_CACHE_SIZE = int(os.getenv("ANALYZER_RESULT_CACHE_SIZE", "256"))
+
+# Failed analyses are remembered briefly so retries don't repeat slow failures
+ERROR_CACHE_TTL = 30.0
+
+# LLM comment check results kept for recently analyzed file contents
+LLM_CACHE_SIZE = 256
+
+# LLM severities by name
+SEVERITY_BY_NAME = {severity.name: severity for severity in ViolationSeverity}
+
+# Snippets of over-long lines are cut to this many characters
+LONG_LINE_SNIPPET_CHARS = 100
+
+# Parsed style guides kept for recently used guide texts; a batch usually
+# checks every file against the same one
+STYLE_GUIDE_CACHE_SIZE = 16
+
+# Small files whose combined size stays under this (~4K tokens) share one LLM
+# comment check request in analyze_files
+LLM_BATCH_MAX_CHARS = int(os.getenv("LLM_BATCH_MAX_CHARS", "16000"))
+
+# Files analyzed at once by analyze_files; Ollama itself serves up to
+# OLLAMA_NUM_PARALLEL requests per model concurrently and queues the rest
+ANALYZER_CONCURRENCY = int(os.getenv("ANALYZER_CONCURRENCY", "8"))
+
+# Worker processes for the CPU-bound rule checks; with 0 they run in a thread
+# of this process instead. Processes sidestep the GIL when a batch analyzes
+# many files at once, at the cost of sending each file to a worker.
+ANALYZER_PROCESSES = int(os.getenv("ANALYZER_PROCESSES", "0"))
+
+
+@dataclass(frozen=True, slots=True)
+class ParsedStyleGuide:
+    """What the rule checks need from a style guide, derived once per guide text"""
+    check_magic_numbers: bool
+
+
+EMPTY_STYLE_GUIDE = ParsedStyleGuide(check_magic_numbers=False)
 
 
 class CppAnalyzer:
@@ -21,117 +147,525 @@ class CppAnalyzer:
     - RAG for style guide context
     """
 
-    def __init__(self):
-        self.tree_sitter_parser = TreeSitterParser()
-        self.ollama_service = OllamaService()
-        self.rag_service = RAGService()
+    def __init__(
+        self,
+        rag_service: Optional["RAGService"] = None,
+        ollama_service: Optional[OllamaService] = None
+    ):
+        self._init_rule_checks()
+        # Share the application's RAG and Ollama services when given them, so
+        # the embedding model, vector DB client and HTTP client are only created once
+        self._shared_rag_service = rag_service
+        self._shared_ollama_service = ollama_service
+        # Successful LLM comment checks by _comment_check_key(code); the prompt
+        # only depends on the code, so a re-run with another style guide or
+        # after a whitespace-only edit reuses it
+        self._llm_cache: "OrderedDict[str, Dict]" = OrderedDict()
+        # Batched comment check in flight for each key it covers
+        self._llm_pending: Dict[str, "asyncio.Task[None]"] = {}
+        # Recent results keyed by (file hash, style guide hash, use_rag)
+        self._result_cache: "OrderedDict[Tuple[str, str, bool], AnalysisResult]" = OrderedDict()
+        # Failed results by the same key, each kept for ERROR_CACHE_TTL seconds
+        self._error_cache: "OrderedDict[Tuple[str, str, bool], Tuple[float, AnalysisResult]]" = OrderedDict()
+        # Started on first use when ANALYZER_PROCESSES is set
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+
+    def _init_rule_checks(self) -> None:
+        """State used by the rule-based checks, which is all a worker process needs"""
         self.style_processor = StyleGuideProcessor()
+        # Parsed style guides by content hash; rule checks run in worker
+        # threads, so the cache is guarded by a lock
+        self._style_guide_cache: "OrderedDict[str, ParsedStyleGuide]" = OrderedDict()
+        self._style_guide_lock = threading.Lock()
+
+    # The services below are built on first use, so rule-only analyses
+    # never create an Ollama client or load the embedding model
+
+    @cached_property
+    def ollama_service(self) -> OllamaService:
+        return self._shared_ollama_service or OllamaService()
+
+    @cached_property
+    def rag_service(self) -> "RAGService":
+        if self._shared_rag_service is not None:
+            return self._shared_rag_service
+        from app.services.rag_service import RAGService
+        return RAGService()
+
+    @cached_property
+    def tree_sitter_parser(self) -> TreeSitterParser:
+        return TreeSitterParser()
+
+    def close(self) -> None:
+        """Stop the rule check worker processes, if any were started"""
+        if self._process_pool is not None:
+            self._process_pool.shutdown(cancel_futures=True)
+            self._process_pool = None
 
     async def analyze_file(
         self,
-        file_content: str,
+        file_content: Union[str, bytes],
         file_name: str,
         file_path: str,
         style_guide: str,
-        use_rag: bool = True
+        use_rag: bool = True,
+        style_guide_hash: Optional[str] = None,
+        include_stats: bool = True
     ) -> AnalysisResult:
         """
         Analyze a C++ file for style violations using rule-based checks and optionally LLM+RAG.
 
         Args:
-            file_content: Source code content
+            file_content: Source code content (raw UTF-8 bytes are decoded once here)
             file_name: Name of the file
             file_path: Path to the file
             style_guide: Style guide content
             use_rag: Whether to use RAG for additional context
+            style_guide_hash: content_hash of style_guide, if the caller already has it
+            include_stats: Whether to fill in violations_by_severity and violations_by_type
 
         Returns:
             AnalysisResult with all detected violations
         """
+        violations = []
+        summary = None
+        async for item in self.stream_analysis(
+            file_content, file_name, file_path, style_guide, use_rag, style_guide_hash, include_stats
+        ):
+            if isinstance(item, Violation):
+                violations.append(item)
+            else:
+                summary = item
+
+        if summary.status != "success":
+            violations = []
+
+        return AnalysisResult(violations=violations, **summary.model_dump())
+
+    async def analyze_files(
+        self,
+        files: List[Tuple[Union[str, bytes], str, str]],
+        style_guide: str,
+        use_rag: bool = True,
+        style_guide_hash: Optional[str] = None
+    ) -> List[AnalysisResult]:
+        """
+        Analyze several files concurrently against the same style guide.
+
+        Args:
+            files: (file_content, file_name, file_path) for each file
+            style_guide: Style guide content
+            use_rag: Whether to use RAG for additional context
+            style_guide_hash: content_hash of style_guide, if the caller already has it
+
+        Returns:
+            One AnalysisResult per file, in the same order
+        """
+        if style_guide_hash is None:
+            # Hashed once here rather than once per file
+            style_guide_hash = content_hash(style_guide.encode("utf-8"))
+
+        if use_rag:
+            # Batched comment checks run alongside the analyses; only the
+            # analyses of the files in a batch wait for it
+            self._start_comment_check_batches(files)
+
+        semaphore = asyncio.Semaphore(ANALYZER_CONCURRENCY)
+
+        async def analyze_one(file_content, file_name, file_path):
+            async with semaphore:
+                return await self.analyze_file(
+                    file_content, file_name, file_path, style_guide, use_rag, style_guide_hash
+                )
+
+        return await asyncio.gather(*(analyze_one(*f) for f in files))
+
+    def _start_comment_check_batches(self, files: List[Tuple[Union[str, bytes], str, str]]) -> None:
+        """
+        Start the LLM comment check for small files in combined requests.
+
+        Files that fit in LLM_BATCH_MAX_CHARS are packed into groups, and one
+        task checks every group with one Ollama call each. Results land in the
+        LLM cache; until then the task is in _llm_pending under each file's
+        key, so the per-file analysis waits for it instead of making its own
+        call. Files that are large, already cached or pending, alone in their
+        group or part of a failed batch are checked individually as usual.
+        """
+        pending = {}
+        for file_content, file_name, _ in files:
+            file_bytes = file_content.encode("utf-8") if isinstance(file_content, str) else file_content
+            if len(file_bytes) > LLM_BATCH_MAX_CHARS:
+                continue
+            try:
+                code = file_bytes.decode("utf-8")
+            except UnicodeDecodeError:
+                continue  # Reported by the file's own analysis
+            key = _comment_check_key(code)
+            if key in self._llm_cache or key in self._llm_pending or key in pending:
+                continue
+            pending[key] = (file_name, code)
+
+        # Greedily pack files into groups of at most LLM_BATCH_MAX_CHARS
+        groups: List[List[Tuple[str, str, str]]] = []
+        group_size = LLM_BATCH_MAX_CHARS
+        for key, (file_name, code) in pending.items():
+            if group_size + len(code) > LLM_BATCH_MAX_CHARS:
+                groups.append([])
+                group_size = 0
+            groups[-1].append((key, file_name, code))
+            group_size += len(code)
+
+        batches = [group for group in groups if len(group) > 1]
+        if not batches:
+            return
+
+        logger.info(
+            "Checking comments of %d small files in %d batched LLM request(s)",
+            sum(map(len, batches)), len(batches)
+        )
+        task = asyncio.create_task(self._run_comment_check_batches(batches))
+        for group in batches:
+            for key, _, _ in group:
+                self._llm_pending[key] = task
+
+    async def _run_comment_check_batches(self, batches: List[List[Tuple[str, str, str]]]) -> None:
+        """Check each group of (key, file_name, code) with one request, caching the results"""
+        try:
+            batch_results = await asyncio.gather(*(
+                self.ollama_service.check_comment_quality_batch([(file_name, code) for _, file_name, code in group])
+                for group in batches
+            ))
+
+            for group, batch_result in zip(batches, batch_results):
+                if batch_result.get("status") != "success":
+                    continue
+                for (key, _, _), violations in zip(group, batch_result["results"]):
+                    self._store_llm_result(key, {"violations": violations, "status": "success"})
+        except Exception as e:
+            # The files fall back to individual checks
+            logger.error("Error during batched comment quality check: %s", e)
+        finally:
+            for group in batches:
+                for key, _, _ in group:
+                    self._llm_pending.pop(key, None)
+
+    async def stream_analysis(
+        self,
+        file_content: Union[str, bytes],
+        file_name: str,
+        file_path: str,
+        style_guide: str,
+        use_rag: bool = True,
+        style_guide_hash: Optional[str] = None,
+        include_stats: bool = True
+    ) -> AsyncIterator[Union[Violation, AnalysisSummary]]:
+        """
+        Analyze a C++ file, yielding violations as each step produces them.
+
+        Rule-based violations are yielded as soon as those checks finish, without
+        waiting for the LLM. Duplicates (same line and type) are skipped as they
+        arrive. The last item is always an AnalysisSummary; if analysis fails it
+        has status "error" and the violations already yielded should be discarded.
+
+        The summary's metrics carry wall-clock phase timings in milliseconds:
+        "rules" (Steps 1-2), "llm" (Step 3 from request to last issue),
+        "llm_wait" (time spent waiting on Step 3 after the rule checks) and
+        "total".
+
+        style_guide_hash is the content_hash of style_guide; pass it when it is
+        already known (e.g. from RAGService.get_document) to skip rehashing.
+        With include_stats=False the summary's violations_by_severity and
+        violations_by_type are left empty and never computed.
+        """
+        started = time.perf_counter_ns()
+        spans: Dict[str, float] = {}
+        llm_task = None
+        cache_key = None
+        # A failed LLM check still gives a usable result, but it isn't cached
+        # so the next request for the same file retries the check
+        llm_failed = False
         try:
-            print(f"\n{'='*60}")
-            print(f"Starting analysis for: {file_name}")
-            print(f"File size: {len(file_content)} characters")
-            print(f"{'='*60}\n")
-
-            # Step 1: Formatting checks
-            print("Step 1: Running formatting checks...")
-            print("  - Proper indentation (nesting levels)")
-            print("  - Line length (<200 chars)")
-            print("  - Single-line if statements (missing braces)")
-            print("  - File header comment")
-            print("  - No comments check - CRITICAL (excluding header)")
-            violations = self._run_basic_checks(file_content, style_guide)
-            print(f"[OK] Found {len(violations)} formatting violations")
-
-            # Step 2: Algorithmic semantic checks
-            print("\nStep 2: Running algorithmic semantic checks...")
-            print("  - Memory leaks (new/delete matching)")
-            print("  - Naming conventions (camelCase/PascalCase)")
-
-            # Check if style guide mentions magic numbers
-            check_magic_numbers = False
-            if style_guide:
-                style_guide_lower = style_guide.lower()
-                if 'magic number' in style_guide_lower or 'const' in style_guide_lower or 'named constant' in style_guide_lower:
-                    check_magic_numbers = True
-                    print("  - Magic numbers (hardcoded literals)")
-
-            print("  - NULL vs nullptr")
-            semantic_violations = self._run_semantic_checks(file_content, check_magic_numbers)
-            print(f"[OK] Found {len(semantic_violations)} semantic violations")
-            violations.extend(semantic_violations)
-
-            # Step 3: LLM comment quality check (simple task)
+            # Identical content analyzed with the same guide gives the same result
+            if isinstance(file_content, str):
+                file_content = file_content.encode("utf-8")
+            if style_guide_hash is None:
+                style_guide_hash = content_hash(style_guide.encode("utf-8"))
+            cache_key = (content_hash(file_content), style_guide_hash, use_rag)
+
+            cached = self._get_cached_result(cache_key)
+            if cached is not None:
+                for v in cached.violations:
+                    yield v
+                stats = {}
+                if not include_stats:
+                    stats = {"violations_by_severity": {}, "violations_by_type": {}}
+                elif cached.status == "success" and not cached.violations_by_severity:
+                    # Cached by a request that skipped the counts
+                    by_severity, by_type = self._count_violations(cached.violations)
+                    stats = {"violations_by_severity": by_severity, "violations_by_type": by_type}
+                yield AnalysisSummary(**{
+                    **cached.model_dump(exclude={"violations"}),
+                    **stats,
+                    "file_name": file_name,
+                    "file_path": file_path,
+                    "timestamp": datetime.now(),
+                    "metrics": {"spans": {"total": _elapsed_ms(started)}, "cached": True}
+                })
+                return
+
+            file_content = file_content.decode("utf-8")
+
+            logger.info("Starting analysis for: %s (%d characters)", file_name, len(file_content))
+
+            # Step 3 (LLM) doesn't depend on the rule-based checks, so start it
+            # first and run Steps 1-2 in a worker thread while it is in flight.
+            # Its issues arrive on llm_queue as they stream in, ending with None.
+            llm_queue: "asyncio.Queue[Optional[Dict]]" = asyncio.Queue()
+            llm_started = time.perf_counter_ns()
             if use_rag:
-                print("\nStep 3: LLM comment quality analysis...")
-                print("  [WAIT] Checking if comments are descriptive...")
-                llm_result = await self.ollama_service.check_comment_quality(
-                    code=file_content
-                )
+                llm_key = _comment_check_key(file_content)
+                llm_result = self._llm_cache.get(llm_key)
+                if llm_result is not None:
+                    self._llm_cache.move_to_end(llm_key)
+                    logger.info("Step 3: [CACHE] Reusing comment check for unchanged code")
+                    for item in llm_result["violations"]:
+                        llm_queue.put_nowait(item)
+                    llm_queue.put_nowait(None)
+                elif llm_key in self._llm_pending:
+                    logger.info("Step 3: Waiting for batched LLM comment check")
+                    llm_task = asyncio.create_task(self._await_batched_comment_check(
+                        self._llm_pending[llm_key], llm_key, file_content, llm_queue
+                    ))
+                else:
+                    logger.info("Step 3: LLM comment quality analysis started")
+                    llm_task = asyncio.create_task(
+                        self._stream_llm_comment_check(file_content, llm_queue)
+                    )
 
-                if llm_result.get("status") == "success" and llm_result.get("violations"):
-                    llm_violations = self._convert_llm_violations(llm_result["violations"])
-                    print(f"[OK] Found {len(llm_violations)} comment quality issues")
-                    violations.extend(llm_violations)
+            # Duplicate violations (same line and type) are dropped as they arrive
+            seen = set()
+            violations = []
+            rules_started = time.perf_counter_ns()
+            rule_violations = await self._run_rule_checks_off_loop(file_content, style_guide, cache_key[1])
+            spans["rules"] = _elapsed_ms(rules_started)
+            for v in rule_violations:
+                key = (v.line_number, v.type)
+                if key not in seen:
+                    seen.add(key)
+                    violations.append(v)
+                    yield v
+
+            # Step 3: LLM comment quality check (simple task); each issue is
+            # yielded as soon as the model has written it
+            if use_rag:
+                logger.debug("Step 3: Waiting for LLM comment quality issues")
+                wait_started = time.perf_counter_ns()
+                llm_count = 0
+                while (item := await llm_queue.get()) is not None:
+                    for v in self._convert_llm_violations([item]):
+                        llm_count += 1
+                        key = (v.line_number, v.type)
+                        if key not in seen:
+                            seen.add(key)
+                            violations.append(v)
+                            yield v
+
+                if llm_task is not None:
+                    llm_result = await llm_task
+                    if llm_result.get("status") == "success":
+                        self._store_llm_result(llm_key, llm_result)
+                    else:
+                        llm_failed = True
+                    spans["llm"] = _elapsed_ms(llm_started)
+                spans["llm_wait"] = _elapsed_ms(wait_started)
+
+                if llm_count:
+                    logger.info("[OK] Found %d comment quality issues", llm_count)
                 else:
-                    print("[OK] Comments are adequately descriptive")
+                    logger.info("[OK] Comments are adequately descriptive")
             else:
-                print("\nStep 3: LLM disabled, skipping comment quality check")
+                logger.info("Step 3: LLM disabled, skipping comment quality check")
 
-            # Remove duplicate violations (same line and type)
-            print(f"\nStep 4: Deduplicating violations...")
-            violations = self._deduplicate_violations(violations)
-            print(f"[OK] Final violation count: {len(violations)}")
-            print(f"{'='*60}\n")
+            logger.info("Step 4: %d violations after deduplication for %s", len(violations), file_name)
 
             # Calculate statistics
-            violations_by_severity = self._count_by_severity(violations)
-            violations_by_type = self._count_by_type(violations)
+            violations_by_severity, violations_by_type = (
+                self._count_violations(violations) if include_stats else ({}, {})
+            )
+            spans["total"] = _elapsed_ms(started)
+            logger.info("Timings for %s (ms): %s", file_name, spans)
 
-            return AnalysisResult(
+            summary = AnalysisSummary(
                 file_name=file_name,
                 file_path=file_path,
                 timestamp=datetime.now(),
-                violations=violations,
                 total_violations=len(violations),
                 violations_by_severity=violations_by_severity,
                 violations_by_type=violations_by_type,
-                status="success"
+                status="success",
+                metrics={"spans": spans}
             )
+            if not llm_failed:
+                self._store_result(cache_key, AnalysisResult(violations=violations, **summary.model_dump()))
+            yield summary
         except Exception as e:
-            print(f"Error during analysis: {e}")
-            return AnalysisResult(
+            logger.error("Error during analysis of %s: %s", file_name, e)
+            summary = AnalysisSummary(
                 file_name=file_name,
                 file_path=file_path,
                 timestamp=datetime.now(),
-                violations=[],
                 total_violations=0,
                 violations_by_severity={},
                 violations_by_type={},
                 status="error",
-                error_message=str(e)
+                error_message=str(e),
+                metrics={"spans": {**spans, "total": _elapsed_ms(started)}}
+            )
+            if cache_key is not None:
+                self._store_result(cache_key, AnalysisResult(violations=[], **summary.model_dump()))
+            yield summary
+        finally:
+            # The consumer may stop early (e.g. a client disconnecting mid-stream)
+            if llm_task is not None and not llm_task.done():
+                llm_task.cancel()
+
+    async def _stream_llm_comment_check(self, code: str, queue: "asyncio.Queue[Optional[Dict]]") -> Dict:
+        """
+        Run the streamed LLM comment check, putting each issue on queue
+
+        The queue always ends with None, even on failure. Returns a result in
+        the same form as OllamaService.check_comment_quality for caching.
+        """
+        violations = []
+        try:
+            async for v in self.ollama_service.stream_comment_quality(code):
+                violations.append(v)
+                queue.put_nowait(v)
+            return {"violations": violations, "status": "success"}
+        except Exception as e:
+            # Issues already streamed are kept, but the result isn't cached
+            logger.error("Error during comment quality check: %s", e)
+            return {"violations": violations, "status": "error", "error": str(e)}
+        finally:
+            queue.put_nowait(None)
+
+    async def _await_batched_comment_check(
+        self,
+        batch: "asyncio.Task[None]",
+        key: str,
+        code: str,
+        queue: "asyncio.Queue[Optional[Dict]]"
+    ) -> Dict:
+        """
+        Wait for the batched request covering code and pass on its issues
+
+        Falls back to an individual check if the batch failed. Like
+        _stream_llm_comment_check, the queue always ends with None.
+        """
+        # asyncio.wait doesn't cancel the shared batch if this task is cancelled
+        await asyncio.wait([batch])
+        llm_result = self._llm_cache.get(key)
+        if llm_result is None:
+            return await self._stream_llm_comment_check(code, queue)
+
+        for item in llm_result["violations"]:
+            queue.put_nowait(item)
+        queue.put_nowait(None)
+        return llm_result
+
+    def _get_cached_result(self, key: Tuple[str, str, bool]) -> Optional[AnalysisResult]:
+        """Look up a previous result in the result and error caches"""
+        if key in self._result_cache:
+            self._result_cache.move_to_end(key)
+            return self._result_cache[key]
+
+        if key in self._error_cache:
+            stored_at, result = self._error_cache[key]
+            if time.monotonic() - stored_at < ERROR_CACHE_TTL:
+                return result
+            del self._error_cache[key]
+
+        return None
+
+    def _store_result(self, key: Tuple[str, str, bool], result: AnalysisResult) -> None:
+        """Remember a result, evicting the least recently used one when full"""
+        if result.status != "success":
+            now = time.monotonic()
+            # Entries are in insertion order, so expired ones are at the front
+            while self._error_cache:
+                stored_at, _ = next(iter(self._error_cache.values()))
+                if now - stored_at < ERROR_CACHE_TTL:
+                    break
+                self._error_cache.popitem(last=False)
+            self._error_cache.pop(key, None)
+            self._error_cache[key] = (now, result)
+            if len(self._error_cache) > RESULT_CACHE_SIZE:
+                self._error_cache.popitem(last=False)
+            return
+
+        self._result_cache[key] = result
+        if len(self._result_cache) > RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+
+    def _store_llm_result(self, key: str, llm_result: Dict) -> None:
+        """Remember a successful LLM result, evicting the oldest when full"""
+        self._llm_cache[key] = llm_result
+        if len(self._llm_cache) > LLM_CACHE_SIZE:
+            self._llm_cache.popitem(last=False)
+
+    async def _run_rule_checks_off_loop(
+        self,
+        file_content: str,
+        style_guide: str,
+        style_guide_hash: Optional[str] = None
+    ) -> List[Violation]:
+        """Run _run_rule_checks in a worker process if configured, else in a thread"""
+        if ANALYZER_PROCESSES <= 0:
+            return await asyncio.to_thread(self._run_rule_checks, file_content, style_guide, style_guide_hash)
+
+        if self._process_pool is None:
+            # spawn, since forking a process running an event loop and
+            # worker threads can copy locks held by other threads
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=ANALYZER_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn")
             )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._process_pool, _run_rule_checks_in_worker, file_content, style_guide, style_guide_hash
+        )
+
+    def _run_rule_checks(self, file_content: str, style_guide: str, style_guide_hash: Optional[str] = None) -> List[Violation]:
+        """
+        Run the rule-based Steps 1 and 2 (CPU-bound, safe to run in a thread)
+
+        style_guide_hash is the guide's content hash when the caller already
+        computed it, so the guide isn't encoded and hashed a second time.
+        """
+        # Split and strip once; every check in both steps works on the same
+        # lines, and most of them only look at the stripped text
+        lines = file_content.split('\n')
+        stripped_lines = [line.strip() for line in lines]
+
+        # Step 1: Formatting checks
+        logger.debug(
+            "Step 1: Running formatting checks (indentation, line length, "
+            "single-line if statements, file header comment, no comments)"
+        )
+        violations = self._run_basic_checks(lines, stripped_lines, style_guide)
+        logger.info("[OK] Found %d formatting violations", len(violations))
+
+        # Step 2: Algorithmic semantic checks
+        # Check if style guide mentions magic numbers
+        check_magic_numbers = self._get_parsed_style_guide(style_guide, style_guide_hash).check_magic_numbers
+        logger.debug(
+            "Step 2: Running algorithmic semantic checks (memory leaks, naming conventions, %sNULL vs nullptr)",
+            "magic numbers, " if check_magic_numbers else ""
+        )
+        semantic_violations = self._run_semantic_checks(stripped_lines, check_magic_numbers)
+        logger.info("[OK] Found %d semantic violations", len(semantic_violations))
+        violations.extend(semantic_violations)
+        return violations
 
     def _get_rag_context(self, code: str, style_guide: str) -> Optional[str]:
         """Retrieve relevant context from RAG system"""
@@ -149,7 +683,7 @@ class CppAnalyzer:
             return None
 
         except Exception as e:
-            print(f"Error retrieving RAG context: {e}")
+            logger.error("Error retrieving RAG context: %s", e)
             return None
 
     def _convert_llm_violations(self, llm_violations: List[Dict]) -> List[Violation]:
@@ -159,8 +693,12 @@ class CppAnalyzer:
             try:
                 violations.append(
                     Violation(
-                        type=v.get("type", "style_violation"),
-                        severity=ViolationSeverity[v.get("severity", "WARNING")],
+                        # Types parsed from the LLM's JSON are fresh strings; intern
+                        # them so repeats share one object like the built-in ones
+                        type=sys.intern(v.get("type", "style_violation")),
+                        # Unknown severities fall back to WARNING rather than
+                        # dropping the issue through a KeyError
+                        severity=SEVERITY_BY_NAME.get(v.get("severity"), ViolationSeverity.WARNING),
                         line_number=v.get("line_number", 1),
                         description=v.get("description", "Style violation"),
                         rule_reference=v.get("rule_reference", ""),
@@ -168,132 +706,93 @@ class CppAnalyzer:
                     )
                 )
             except Exception as e:
-                print(f"Error converting violation: {e}")
+                logger.warning("Error converting violation: %s", e)
                 continue
         return violations
 
-    def _deduplicate_violations(self, violations: List[Violation]) -> List[Violation]:
-        """Remove duplicate violations based on line number and type"""
-        seen = set()
-        unique = []
-        for v in violations:
-            key = (v.line_number, v.type)
-            if key not in seen:
-                seen.add(key)
-                unique.append(v)
-        return unique
-
-    def _merge_violations_smart(
-        self,
-        basic_violations: List[Violation],
-        llm_violations: List[Violation]
-    ) -> List[Violation]:
-        """
-        Intelligently merge violations from rule-based and LLM analysis.
-        Deduplicates violations that refer to the same issue.
-        """
-        merged = list(basic_violations)  # Start with all basic violations
-        
-        # Track which lines already have violations
-        existing_line_types = {}
-        for v in basic_violations:
-            key = (v.line_number, v.type)
-            existing_line_types[key] = True
-        
-        # Add LLM violations if they're not duplicates
-        for llm_v in llm_violations:
-            key = (llm_v.line_number, llm_v.type)
-            
-            # Only add if this line+type combo doesn't exist
-            # This prevents duplicate detections of the same issue
-            if key not in existing_line_types:
-                merged.append(llm_v)
-                existing_line_types[key] = True
-        
-        # Sort by line number for easier reading
-        merged.sort(key=lambda v: v.line_number)
-        
-        return merged
-
     # --- Built-in algorithmic checks (always run) ---
+    # Checks build their own Violations from trusted values, so they use
+    # model_construct to skip validation; LLM output is still validated.
+    # Each check is a generator, so violations go straight into the step's
+    # single list instead of a per-check list copied into it.
 
-    def _run_basic_checks(self, code: str, style_guide_text: str) -> List[Violation]:
+    def _run_basic_checks(self, lines: List[str], stripped_lines: List[str], style_guide_text: str) -> List[Violation]:
         """
         Run built-in algorithmic formatting checks.
         These checks always run regardless of uploaded style guide.
+
+        stripped_lines holds line.strip() for each of lines.
         """
         violations: List[Violation] = []
-        lines = code.split('\n')
 
         try:
             # 1. Check for proper indentation (nesting levels)
-            violations.extend(self._check_proper_indentation(lines))
+            violations.extend(self._check_proper_indentation(lines, stripped_lines))
         except Exception as e:
-            print(f"[ERROR] in _check_proper_indentation: {e}")
+            logger.error("[ERROR] in _check_proper_indentation: %s", e)
 
         try:
             # 2. Check for extremely long lines (>200 chars)
             violations.extend(self._check_line_length(lines, 200))
         except Exception as e:
-            print(f"[ERROR] in _check_line_length: {e}")
+            logger.error("[ERROR] in _check_line_length: %s", e)
 
         try:
             # 3. Check for single-line if statements without braces
-            violations.extend(self._check_single_line_if_statements(lines))
+            violations.extend(self._check_single_line_if_statements(lines, stripped_lines))
         except Exception as e:
-            print(f"[ERROR] in _check_single_line_if_statements: {e}")
+            logger.error("[ERROR] in _check_single_line_if_statements: %s", e)
 
         try:
             # 4. Check for file header comment
-            violations.extend(self._check_file_header_comment(lines))
+            violations.extend(self._check_file_header_comment(stripped_lines))
         except Exception as e:
-            print(f"[ERROR] in _check_file_header_comment: {e}")
+            logger.error("[ERROR] in _check_file_header_comment: %s", e)
 
         try:
             # 5. CRITICAL: Check if file has NO comments (excluding header)
-            violations.extend(self._check_no_comments(lines))
+            violations.extend(self._check_no_comments(stripped_lines))
         except Exception as e:
-            print(f"[ERROR] in _check_no_comments: {e}")
+            logger.error("[ERROR] in _check_no_comments: %s", e)
 
         return violations
 
-    def _check_proper_indentation(self, lines: List[str]) -> List[Violation]:
+    def _check_proper_indentation(self, lines: List[str], stripped_lines: List[str]) -> Iterator[Violation]:
         """Check for proper indentation based on brace nesting levels"""
-        violations = []
         uses_tabs = None
         uses_spaces = None
         indent_size = None
 
         # First pass: determine if file uses tabs or spaces and indentation size
-        for line in lines:
-            if not line.strip() or len(line) == len(line.lstrip()):
+        for line, stripped in zip(lines, stripped_lines):
+            if not stripped or len(line) == len(line.lstrip()):
                 continue
 
             # Check what type of indentation is used
             if line[0] == '\t':
                 if uses_spaces:
                     # Mixing tabs and spaces
-                    violations.append(Violation(
+                    yield Violation.model_construct(
                         type="mixed_indentation",
                         severity=ViolationSeverity.WARNING,
                         line_number=1,
                         description="File mixes tabs and spaces for indentation. Use one consistently.",
                         rule_reference="Consistent Indentation"
-                    ))
-                    return violations
+                    )
+                    return
                 uses_tabs = True
                 indent_size = 1
             elif line[0] == ' ':
                 if uses_tabs:
                     # Mixing tabs and spaces
-                    violations.append(Violation(
+                    yield Violation.model_construct(
                         type="mixed_indentation",
                         severity=ViolationSeverity.WARNING,
                         line_number=1,
                         description="File mixes tabs and spaces for indentation. Use one consistently.",
                         rule_reference="Consistent Indentation"
-                    ))
-                    return violations
+                    )
+                    return
                 uses_spaces = True
                 if indent_size is None:
                     # Use standard: 4 spaces = 1 tab = 1 level
@@ -301,15 +800,13 @@ class CppAnalyzer:
 
         if uses_tabs is None and uses_spaces is None:
             # No indented lines found
-            return violations
+            return
 
         # Second pass: check that indentation levels match brace nesting
         expected_level = 0
         in_switch = False
 
-        for i, line in enumerate(lines, 1):
-            stripped = line.strip()
-
+        for i, (line, stripped) in enumerate(zip(lines, stripped_lines), 1):
             # Skip empty lines and preprocessor directives
             if not stripped or stripped.startswith('#'):
                 continue
@@ -342,41 +839,38 @@ class CppAnalyzer:
                 is_inside_switch = in_switch and (current_indent == expected_level + 1 or is_case_related)
 
                 if not (is_label or is_inside_switch):
-                    violations.append(Violation(
+                    yield Violation.model_construct(
                         type="improper_indentation",
                         severity=ViolationSeverity.WARNING,
                         line_number=i,
                         description=f"Indentation level {current_indent} does not match expected nesting level {expected_level}",
                         rule_reference="Proper Indentation",
                         code_snippet=line.rstrip()
-                    ))
+                    )
 
             # Check for opening braces (increase expected level after this line)
             if '{' in stripped and not stripped.startswith('}'):
                 expected_level += stripped.count('{') - stripped.count('}')
 
-        return violations
-
-    def _check_line_length(self, lines: List[str], max_length: int) -> List[Violation]:
+    def _check_line_length(self, lines: List[str], max_length: int) -> Iterator[Violation]:
         """Check for extremely long lines (>200 chars)"""
-        violations = []
-
-        for i, line in enumerate(lines, 1):
-            if len(line) > max_length:
-                violations.append(Violation(
-                    type="line_too_long",
-                    severity=ViolationSeverity.MINOR,
-                    line_number=i,
-                    description=f"Line is {len(line)} characters long (exceeds {max_length} character limit)",
-                    rule_reference="Maximum Line Length",
-                    code_snippet=line[:100] + "..." if len(line) > 100 else line
-                ))
-
-        return violations
+        # Compare all line lengths at once; only the long lines are visited
+        lengths = np.fromiter(map(len, lines), dtype=np.intp, count=len(lines))
+        for index in np.flatnonzero(lengths > max_length).tolist():
+            line = lines[index]
+            length = len(line)
+            snippet = line[:LONG_LINE_SNIPPET_CHARS] + "..." if length > LONG_LINE_SNIPPET_CHARS else line
+            yield Violation.model_construct(
+                type="line_too_long",
+                severity=ViolationSeverity.MINOR,
+                line_number=index + 1,
+                description=f"Line is {length} characters long (exceeds {max_length} character limit)",
+                rule_reference="Maximum Line Length",
+                code_snippet=snippet
+            )
 
-    def _check_consistent_braces(self, lines: List[str]) -> List[Violation]:
+    def _check_consistent_braces(self, lines: List[str]) -> Iterator[Violation]:
         """Check that opening braces are placed consistently (same line OR next line, not mixed)"""
-        violations = []
         same_line_count = 0
         next_line_count = 0
 
@@ -384,50 +878,48 @@ class CppAnalyzer:
             stripped = line.strip()
 
             # Check for function/control structure followed by brace on same line
-            if re.search(r'(if|else|for|while|switch|class|struct)\s*\([^)]*\)\s*\{', stripped) or \
-               re.search(r'(class|struct)\s+\w+\s*\{', stripped):
+            if BRACE_SAME_LINE_RE.search(stripped) or \
+               TYPE_BRACE_SAME_LINE_RE.search(stripped):
                 same_line_count += 1
 
             # Check for standalone opening brace (next line style)
             if stripped == '{' and i > 1:
                 prev_line = lines[i-2].strip()
-                if re.search(r'(if|else|for|while|switch|class|struct)', prev_line):
+                if BLOCK_KEYWORD_RE.search(prev_line):
                     next_line_count += 1
 
         # If mixing both styles significantly, report it
         if same_line_count > 0 and next_line_count > 0:
-            violations.append(Violation(
+            yield Violation.model_construct(
                 type="inconsistent_brace_placement",
                 severity=ViolationSeverity.MINOR,
                 line_number=1,
                 description=f"File uses both same-line ({same_line_count}) and next-line ({next_line_count}) brace placement. Use one style consistently.",
                 rule_reference="Consistent Brace Placement"
-            ))
-
-        return violations
+            )
 
-    def _check_single_line_if_statements(self, lines: List[str]) -> List[Violation]:
+    def _check_single_line_if_statements(self, lines: List[str], stripped_lines: List[str]) -> Iterator[Violation]:
         """Check for single-line if statements without braces"""
-        violations = []
-
         for i, line in enumerate(lines, 1):
-            stripped = line.strip()
-
-            # Match if/for/while at the start
-            keyword_match = re.match(r'^\s*(if|else\s+if|for|while)\s*\(', line)
+            # Match if/for/while at the start; the prefix test rejects most
+            # lines without running the regex
+            if not stripped_lines[i - 1].startswith(BRACELESS_KEYWORD_PREFIXES):
+                continue
+            keyword_match = BRACELESS_KEYWORD_RE.match(line)
             if keyword_match:
-                # Find the matching closing parenthesis by counting parens
+                # Find the matching closing parenthesis by counting parens;
+                # the regex skips everything between them in C
                 paren_count = 0
                 paren_start = keyword_match.end() - 1  # Position of opening '('
                 paren_end = -1
 
-                for pos in range(paren_start, len(line)):
-                    if line[pos] == '(':
+                for paren in PAREN_RE.finditer(line, paren_start):
+                    if paren.group() == '(':
                         paren_count += 1
-                    elif line[pos] == ')':
+                    else:
                         paren_count -= 1
                         if paren_count == 0:
-                            paren_end = pos
+                            paren_end = paren.start()
                             break
 
                 if paren_end == -1:
@@ -443,56 +935,44 @@ class CppAnalyzer:
 
                 # If there's code on the same line (one-liner), it's a violation
                 if remainder and not remainder.startswith('//'):
-                    violations.append(Violation(
+                    yield Violation.model_construct(
                         type="missing_braces",
                         severity=ViolationSeverity.WARNING,
                         line_number=i,
                         description="Control structure should use braces even for single statements",
                         rule_reference="Always Use Braces",
-                        code_snippet=stripped
-                    ))
+                        code_snippet=stripped_lines[i - 1]
+                    )
                     continue
 
                 # If next line doesn't start with '{', it's a violation
                 if i < len(lines):
-                    next_stripped = lines[i].strip()
+                    next_stripped = stripped_lines[i]
                     if next_stripped and not next_stripped.startswith('{') and not next_stripped.startswith('//'):
-                        violations.append(Violation(
+                        yield Violation.model_construct(
                             type="missing_braces",
                             severity=ViolationSeverity.WARNING,
                             line_number=i,
                             description="Control structure should use braces even for single statements",
                             rule_reference="Always Use Braces",
-                            code_snippet=stripped
-                        ))
-
-        return violations
+                            code_snippet=stripped_lines[i - 1]
+                        )
 
-    def _check_file_header_comment(self, lines: List[str]) -> List[Violation]:
+    def _check_file_header_comment(self, stripped_lines: List[str]) -> Iterator[Violation]:
         """Check for file header comment in first 10 lines"""
-        violations = []
-        has_header_comment = False
-
-        for i in range(min(10, len(lines))):
-            line = lines[i].strip()
-            if line.startswith('//') or line.startswith('/*') or line.startswith('*'):
-                has_header_comment = True
-                break
+        has_header_comment = any(line.startswith(COMMENT_PREFIXES) for line in stripped_lines[:10])
 
         if not has_header_comment:
-            violations.append(Violation(
+            yield Violation.model_construct(
                 type="missing_file_header",
                 severity=ViolationSeverity.MINOR,
                 line_number=1,
                 description="File should have a header comment describing its purpose",
                 rule_reference="File Header Comment"
-            ))
-
-        return violations
+            )
 
-    def _check_comment_frequency(self, lines: List[str]) -> List[Violation]:
+    def _check_comment_frequency(self, lines: List[str]) -> Iterator[Violation]:
         """Check that there's at least one comment every 20 lines of code"""
-        violations = []
         code_lines = 0
         last_comment_line = 0
 
@@ -512,101 +992,86 @@ class CppAnalyzer:
 
                 # If we have 20 lines of code without a comment, flag it
                 if code_lines >= 20:
-                    violations.append(Violation(
+                    yield Violation.model_construct(
                         type="insufficient_comments",
                         severity=ViolationSeverity.MINOR,
                         line_number=i,
                         description=f"No comments found in the last 20 lines of code (since line {last_comment_line})",
                         rule_reference="Comment Frequency"
-                    ))
+                    )
                     code_lines = 0  # Reset to avoid repeated violations
 
-        return violations
-
-    def _check_no_comments(self, lines: List[str]) -> List[Violation]:
+    def _check_no_comments(self, stripped_lines: List[str]) -> Iterator[Violation]:
         """CRITICAL: Check if file has NO comments (excluding header comments)"""
-        violations = []
-        has_non_header_comment = False
-
         # Skip first 10 lines (header comment area)
-        for i, line in enumerate(lines):
-            if i >= 10:  # Only check lines after the header
-                stripped = line.strip()
-                if stripped.startswith('//') or stripped.startswith('/*') or stripped.startswith('*'):
-                    has_non_header_comment = True
-                    break
+        has_non_header_comment = any(
+            line.startswith(COMMENT_PREFIXES) for line in itertools.islice(stripped_lines, 10, None)
+        )
 
         if not has_non_header_comment:
-            violations.append(Violation(
+            yield Violation.model_construct(
                 type="no_comments",
                 severity=ViolationSeverity.CRITICAL,
                 line_number=11,
                 description="File contains NO comments beyond the header. Code must be documented for maintainability.",
                 rule_reference="Code Documentation"
-            ))
-
-        return violations
+            )
 
     # --- Algorithmic semantic checks (always run) ---
 
-    def _run_semantic_checks(self, code: str, check_magic_numbers: bool = False) -> List[Violation]:
+    def _run_semantic_checks(self, stripped_lines: List[str], check_magic_numbers: bool = False) -> List[Violation]:
         """
         Run algorithmic semantic checks for memory leaks, naming, magic numbers, etc.
         These are deterministic and don't rely on LLM.
 
         Args:
-            code: Source code to analyze
+            stripped_lines: Source code lines to analyze, already stripped
             check_magic_numbers: Whether to check for magic numbers (based on style guide)
         """
         violations: List[Violation] = []
-        lines = code.split('\n')
 
         try:
-            violations.extend(self._check_memory_leaks(lines))
+            violations.extend(self._check_memory_leaks(stripped_lines))
         except Exception as e:
-            print(f"[ERROR] in _check_memory_leaks: {e}")
+            logger.error("[ERROR] in _check_memory_leaks: %s", e)
 
         try:
-            violations.extend(self._check_naming_conventions(lines))
+            violations.extend(self._check_naming_conventions(stripped_lines))
         except Exception as e:
-            print(f"[ERROR] in _check_naming_conventions: {e}")
+            logger.error("[ERROR] in _check_naming_conventions: %s", e)
 
         # Only check magic numbers if style guide mentions it
         if check_magic_numbers:
             try:
-                violations.extend(self._check_magic_numbers(lines))
+                violations.extend(self._check_magic_numbers(stripped_lines))
             except Exception as e:
-                print(f"[ERROR] in _check_magic_numbers: {e}")
+                logger.error("[ERROR] in _check_magic_numbers: %s", e)
 
         try:
-            violations.extend(self._check_null_vs_nullptr(lines))
+            violations.extend(self._check_null_vs_nullptr(stripped_lines))
         except Exception as e:
-            print(f"[ERROR] in _check_null_vs_nullptr: {e}")
+            logger.error("[ERROR] in _check_null_vs_nullptr: %s", e)
 
         return violations
 
-    def _check_memory_leaks(self, lines: List[str]) -> List[Violation]:
+    def _check_memory_leaks(self, stripped_lines: List[str]) -> Iterator[Violation]:
         """Detect simple memory leaks - new without corresponding delete"""
-        violations = []
-
         # Track all new allocations and deletes in the code
         new_patterns = []
         delete_patterns = []
 
-        for i, line in enumerate(lines, 1):
-            stripped = line.strip()
-
+        for i, stripped in enumerate(stripped_lines, 1):
             # Skip comments
-            if stripped.startswith('//') or stripped.startswith('/*') or stripped.startswith('*'):
+            if stripped.startswith(COMMENT_PREFIXES):
                 continue
 
             # Find new allocations
             if 'new ' in stripped or 'new[' in stripped:
                 # Extract variable name if possible
-                match = re.search(r'(\w+)\s*=\s*new\s+', stripped)
+                match = NEW_ASSIGN_RE.search(stripped)
                 if match:
                     var_name = match.group(1)
-                    is_array = 'new[]' in stripped or re.search(r'new\s+\w+\[', stripped)
+                    is_array = 'new[]' in stripped or NEW_ARRAY_RE.search(stripped)
                     new_patterns.append({
                         'line': i,
                         'var': var_name,
@@ -616,9 +1081,9 @@ class CppAnalyzer:
 
             # Find delete statements
             if 'delete ' in stripped or 'delete[]' in stripped:
-                match = re.search(r'delete\s*\[\s*\]?\s*(\w+)', stripped)
+                match = DELETE_ARRAY_RE.search(stripped)
                 if not match:
-                    match = re.search(r'delete\s+(\w+)', stripped)
+                    match = DELETE_RE.search(stripped)
                 if match:
                     var_name = match.group(1)
                     is_array_delete = 'delete[]' in stripped or 'delete [' in stripped
@@ -634,97 +1099,85 @@ class CppAnalyzer:
                     new['matched'] = True
                     # Check for delete/delete[] mismatch
                     if new['is_array'] and not delete['is_array']:
-                        violations.append(Violation(
+                        yield Violation.model_construct(
                             type="wrong_delete_type",
                             severity=ViolationSeverity.CRITICAL,
                             line_number=new['line'],
                             description=f"Array allocated with 'new[]' but deleted with 'delete' (should use 'delete[]')",
                             rule_reference="Memory Management"
-                        ))
+                        )
                     elif not new['is_array'] and delete['is_array']:
-                        violations.append(Violation(
+                        yield Violation.model_construct(
                             type="wrong_delete_type",
                             severity=ViolationSeverity.CRITICAL,
                             line_number=new['line'],
                             description=f"Single object allocated with 'new' but deleted with 'delete[]' (should use 'delete')",
                             rule_reference="Memory Management"
-                        ))
+                        )
                     break
 
         # Report unmatched news as memory leaks
         for new in new_patterns:
             if not new['matched']:
                 delete_type = "delete[]" if new['is_array'] else "delete"
-                violations.append(Violation(
+                yield Violation.model_construct(
                     type="memory_leak",
                     severity=ViolationSeverity.CRITICAL,
                     line_number=new['line'],
                     description=f"Memory allocated with 'new' but no corresponding '{delete_type}' found for variable '{new['var']}'",
                     rule_reference="Memory Management"
-                ))
-
-        return violations
+                )
 
-    def _check_naming_conventions(self, lines: List[str]) -> List[Violation]:
+    def _check_naming_conventions(self, stripped_lines: List[str]) -> Iterator[Violation]:
         """Check for camelCase functions and PascalCase classes"""
-        violations = []
-
-        for i, line in enumerate(lines, 1):
-            stripped = line.strip()
-
+        for i, stripped in enumerate(stripped_lines, 1):
             # Skip comments and preprocessor directives
-            if stripped.startswith('//') or stripped.startswith('/*') or stripped.startswith('*') or stripped.startswith('#'):
+            if stripped.startswith(COMMENT_OR_DIRECTIVE_PREFIXES):
                 continue
 
             # Check class names (should be PascalCase)
-            class_match = re.search(r'\bclass\s+([a-zA-Z_]\w*)', stripped)
+            class_match = CLASS_NAME_RE.search(stripped)
             if class_match:
                 class_name = class_match.group(1)
                 # PascalCase: starts with uppercase, no underscores
-                if not re.match(r'^[A-Z][a-zA-Z0-9]*$', class_name):
-                    violations.append(Violation(
+                if not PASCAL_CASE_RE.match(class_name):
+                    yield Violation.model_construct(
                         type="naming_convention",
                         severity=ViolationSeverity.WARNING,
                         line_number=i,
                         description=f"Class '{class_name}' should use PascalCase (e.g., 'MyClass')",
                         rule_reference="Naming Conventions",
                         code_snippet=stripped
-                    ))
+                    )
 
             # Check function names (should be camelCase)
             # Match: return_type function_name(
-            func_match = re.search(r'\b([a-z_]\w*)\s*\([^)]*\)\s*[{;]', stripped)
+            func_match = FUNCTION_CALL_RE.search(stripped)
             if func_match and 'if' not in stripped and 'for' not in stripped and 'while' not in stripped and 'switch' not in stripped:
                 func_name = func_match.group(1)
                 # Exclude constructors, main, common keywords
                 if func_name not in ['main', 'if', 'for', 'while', 'switch', 'return']:
                     # camelCase: starts with lowercase, no underscores (except single letter at start)
                     if '_' in func_name:
-                        violations.append(Violation(
+                        yield Violation.model_construct(
                             type="naming_convention",
                             severity=ViolationSeverity.WARNING,
                             line_number=i,
                             description=f"Function '{func_name}' should use camelCase, not snake_case (e.g., 'myFunction')",
                             rule_reference="Naming Conventions",
                             code_snippet=stripped
-                        ))
-
-        return violations
+                        )
 
-    def _check_magic_numbers(self, lines: List[str]) -> List[Violation]:
+    def _check_magic_numbers(self, stripped_lines: List[str]) -> Iterator[Violation]:
         """Detect hardcoded numeric literals (magic numbers)"""
-        violations = []
-
-        for i, line in enumerate(lines, 1):
-            stripped = line.strip()
-
+        for i, stripped in enumerate(stripped_lines, 1):
             # Skip comments, preprocessor, and includes
-            if stripped.startswith('//') or stripped.startswith('/*') or stripped.startswith('*') or stripped.startswith('#'):
+            if stripped.startswith(COMMENT_OR_DIRECTIVE_PREFIXES):
                 continue
 
             # Find numeric literals that aren't 0, 1, -1
             # Exclude: loop counters (i = 0, i < 10), array indices
-            numbers = re.findall(r'\b(\d+\.?\d*)\b', stripped)
+            numbers = NUMBER_LITERAL_RE.findall(stripped)
 
             for num in numbers:
                 # Allow 0, 1, and single-digit numbers in certain contexts
@@ -732,49 +1185,75 @@ class CppAnalyzer:
                     continue
 
                 # Skip if in loop context
-                if re.search(r'(for|while)\s*\([^)]*' + num, stripped):
+                if _loop_header_number_re(num).search(stripped):
                     continue
 
                 # Skip if it looks like array size or index
-                if re.search(r'\[' + num + r'\]', stripped):
+                if _subscript_number_re(num).search(stripped):
                     continue
 
                 # Flag as magic number
-                violations.append(Violation(
+                yield Violation.model_construct(
                     type="magic_number",
                     severity=ViolationSeverity.WARNING,
                     line_number=i,
                     description=f"Magic number '{num}' should be a named constant (e.g., 'const int MAX_SIZE = {num}')",
                     rule_reference="Magic Numbers",
                     code_snippet=stripped
-                ))
+                )
                 break  # Only report once per line
 
-        return violations
-
-    def _check_null_vs_nullptr(self, lines: List[str]) -> List[Violation]:
+    def _check_null_vs_nullptr(self, stripped_lines: List[str]) -> Iterator[Violation]:
         """Check for NULL usage instead of nullptr"""
-        violations = []
-
-        for i, line in enumerate(lines, 1):
-            stripped = line.strip()
-
+        for i, stripped in enumerate(stripped_lines, 1):
             # Skip comments
-            if stripped.startswith('//') or stripped.startswith('/*') or stripped.startswith('*'):
+            if stripped.startswith(COMMENT_PREFIXES):
                 continue
 
             # Check for NULL (but not in #define NULL or comments)
-            if re.search(r'\bNULL\b', stripped) and not stripped.startswith('#'):
-                violations.append(Violation(
+            if NULL_RE.search(stripped) and not stripped.startswith('#'):
+                yield Violation.model_construct(
                     type="use_nullptr",
                     severity=ViolationSeverity.WARNING,
                     line_number=i,
                     description="Use 'nullptr' instead of 'NULL' in modern C++",
                     rule_reference="Modern C++ Practices",
                     code_snippet=stripped
-                ))
+                )
 
-        return violations
+    def _get_parsed_style_guide(self, style_guide: str, key: Optional[str] = None) -> ParsedStyleGuide:
+        """
+        Style guide data for the rule checks, cached by guide content hash
+
+        Analyzing a directory checks every file against the same guide, so
+        the guide is scanned only once.
+        """
+        if not style_guide:
+            return EMPTY_STYLE_GUIDE
+
+        if key is None:
+            key = content_hash(style_guide.encode("utf-8"))
+        with self._style_guide_lock:
+            parsed = self._style_guide_cache.get(key)
+            if parsed is not None:
+                self._style_guide_cache.move_to_end(key)
+                return parsed
+
+        parsed = self._build_parsed_style_guide(style_guide)
+        with self._style_guide_lock:
+            self._style_guide_cache[key] = parsed
+            if len(self._style_guide_cache) > STYLE_GUIDE_CACHE_SIZE:
+                self._style_guide_cache.popitem(last=False)
+        return parsed
+
+    def _build_parsed_style_guide(self, style_guide: str) -> ParsedStyleGuide:
+        """Derive what the rule checks need from a style guide"""
+        style_guide_lower = style_guide.lower()
+        check_magic_numbers = (
+            'magic number' in style_guide_lower or 'const' in style_guide_lower or 'named constant' in style_guide_lower
+        )
+
+        return ParsedStyleGuide(check_magic_numbers=check_magic_numbers)
 
     def _parse_style_guide_rules(self, content: str):
         """
@@ -813,68 +1292,68 @@ class CppAnalyzer:
 
     # --- Rule matching by text ---
 
-    def _match_rule_to_check_text(self, text: str) -> Optional[Callable[[str, str], List[Tuple[int, Optional[int], str, str]]]]:
-        low = text.lower()
-
-        if "tab" in low and ("indent" in low or "tabs" in low or "no tab" in low):
-            return self._check_no_tabs
+    def _match_rule_to_check_text(self, text: str) -> Optional[str]:
+        """ID of the rule-text check a style guide rule maps to, if any"""
+        # Tokenize once, then each check is a few set lookups
+        words = RULE_WORD_RE.findall(text.lower())
+        tokens = set(words)
+        tokens.update(f"{first} {second}" for first, second in zip(words, words[1:]))
 
-        if "trailing whitespace" in low or "trailing spaces" in low:
-            return self._check_trailing_whitespace
+        for check_id, keyword_groups in RULE_CHECK_TABLE:
+            if all(not group.isdisjoint(tokens) for group in keyword_groups):
+                return check_id
 
-        if "line length" in low or "max line length" in low or "maximum line length" in low:
-            return self._check_line_length
-
-        if ("brace" in low or "braces" in low) and ("same line" in low or "k&r" in low or "opening brace" in low):
-            return self._check_opening_brace_same_line
+        return None
 
-        if ("file header" in low or "header comment" in low or "file comment" in low):
-            return self._check_file_header_comment
+    def _run_rule_text_checks(self, code: str, active_checks: Dict[str, str]) -> List[Tuple[int, Optional[int], str, str]]:
+        """
+        Run the checks matched from style guide rules.
 
-        return None
+        active_checks maps check IDs from _match_rule_to_check_text to the
+        text of the rule that enabled them. The file is split once and all
+        line-local checks share a single pass.
+        """
+        lines = code.splitlines()
+        results = self._run_line_checks(lines, active_checks)
+        if "opening_brace_same_line" in active_checks:
+            results.extend(self._check_opening_brace_same_line(lines))
+        if "file_header_comment" in active_checks:
+            results.extend(self._check_file_header_rule(lines))
+        return results
 
     # --- Checks (return tuples of (line, col, message, violation_type)) ---
 
-    def _check_no_tabs(self, code: str, _rule_text: str):
-        results = []
-        for idx, line in enumerate(code.splitlines(), start=1):
-            if "\t" in line:
-                results.append((idx, line.find("\t") + 1, "Tabs found; use spaces for indentation", "indentation"))
-        return results
+    def _run_line_checks(self, lines: List[str], active_checks: Dict[str, str]) -> List[Tuple[int, Optional[int], str, str]]:
+        """Tabs, trailing whitespace and line length checks, fused into one pass"""
+        check_tabs = "no_tabs" in active_checks
+        check_trailing = "trailing_whitespace" in active_checks
+        limit = None
+        if "line_length" in active_checks:
+            limit = self._extract_first_int(active_checks["line_length"]) or 100
 
-    def _check_trailing_whitespace(self, code: str, _rule_text: str):
         results = []
-        for idx, line in enumerate(code.splitlines(), start=1):
-            if re.search(r"[ \t]+$", line):
+        for idx, line in enumerate(lines, start=1):
+            if check_tabs and "\t" in line:
+                results.append((idx, line.find("\t") + 1, "Tabs found; use spaces for indentation", "indentation"))
+            if check_trailing and TRAILING_WS_RE.search(line):
                 results.append((idx, None, "Trailing whitespace detected", "whitespace"))
-        return results
-
-    def _check_line_length(self, code: str, rule_text: str):
-        limit = self._extract_first_int(rule_text) or 100
-        results = []
-        for idx, line in enumerate(code.splitlines(), start=1):
-            if len(line) > limit and "http" not in line:
+            if limit is not None and len(line) > limit and "http" not in line:
                 results.append((idx, limit + 1, f"Line exceeds maximum length of {limit} characters", "line_length"))
         return results
 
-    def _check_opening_brace_same_line(self, code: str, _rule_text: str):
+    def _check_opening_brace_same_line(self, lines: List[str]):
         results = []
-        lines = code.splitlines()
-        control_re = re.compile(r"^\s*(if|for|while|switch|class|struct|namespace|template|try|catch|do|else|enum)\b.*[^;]$")
-        # fixed truncated regex
-        func_decl_re = re.compile(r"^\s*([A-Za-z_][A-Za-z0-9_:<>~\s*&]+)\s+([A-Za-z_][A-Za-z0-9_:<>~]*)\s*\([^;]*\)\s*(const\s*)?(\w*\s*)?$")
         for i in range(len(lines) - 1):
             curr = lines[i]
             nxt = lines[i + 1]
             if curr.strip().startswith("//") or curr.strip().startswith("/*") or curr.strip().startswith("#"):
                 continue
-            is_header = bool(control_re.match(curr)) or bool(func_decl_re.match(curr))
-            if is_header and "{" not in curr and re.match(r"^\s*{\s*$", nxt):
+            is_header = bool(CONTROL_HEADER_RE.match(curr)) or bool(FUNC_DECL_RE.match(curr))
+            if is_header and "{" not in curr and BRACE_ONLY_RE.match(nxt):
                 results.append((i + 2, 1, "Opening brace should be on the same line as the declaration/statement", "brace_style"))
         return results
 
-    def _check_file_header_comment(self, code: str, _rule_text: str):
-        lines = code.splitlines()
+    def _check_file_header_rule(self, lines: List[str]):
         i = 0
         n = len(lines)
         while i < n and lines[i].strip() == "":
@@ -888,7 +1367,7 @@ class CppAnalyzer:
     # --- Helpers ---
 
     def _extract_first_int(self, text: str) -> Optional[int]:
-        m = re.search(r"(\d+)", text)
+        m = INT_RE.search(text)
         if not m:
             return None
         try:
@@ -904,23 +1383,48 @@ class CppAnalyzer:
 
     # --- Keep existing summary helpers ---
 
-    def _count_by_severity(self, violations: List[Violation]) -> dict:
-        """Count violations by severity level"""
-        counts = {
-            "CRITICAL": 0,
-            "WARNING": 0,
-            "MINOR": 0
-        }
-        for v in violations:
-            # v.severity is ViolationSeverity
-            counts[v.severity.value if hasattr(v.severity, "value") else str(v.severity)] += 1
-        return counts
-
-    def _count_by_type(self, violations: List[Violation]) -> dict:
-        """Count violations by type"""
-        counts = {}
-        for v in violations:
-            counts[v.type] = counts.get(v.type, 0) + 1
-        return counts
+    def _count_violations(self, violations: List[Violation]) -> Tuple[dict, dict]:
+        """Count violations by severity level and by type"""
+        # Counter's C counting loop beats one Python loop doing both; severity
+        # is always a ViolationSeverity, so .value needs no hasattr guard
+        by_severity = Counter({"CRITICAL": 0, "WARNING": 0, "MINOR": 0})
+        by_severity.update(v.severity.value for v in violations)
+        by_type = Counter(v.type for v in violations)
+        return dict(by_severity), dict(by_type)
 
     # --- Remove conflicting sync analyze(req) path to avoid model mismatches ---
+
+
+def _elapsed_ms(start_ns: int) -> float:
+    """Milliseconds since a time.perf_counter_ns() reading"""
+    return round((time.perf_counter_ns() - start_ns) / 1e6, 3)
+
+
+def _comment_check_key(code: str) -> str:
+    """
+    LLM cache key for a file's comment check
+
+    Trailing whitespace and trailing blank lines are ignored: edits that only
+    touch those leave every line number the same, so the model's findings for
+    the earlier version still apply.
+    """
+    normalized = "\n".join(map(str.rstrip, code.split("\n"))).rstrip()
+    return content_hash(normalized.encode("utf-8"))
+
+
+# Rule-check-only analyzer of a worker process, created by its first task
+_worker_analyzer: Optional[CppAnalyzer] = None
+
+
+def _run_rule_checks_in_worker(
+    file_content: str,
+    style_guide: str,
+    style_guide_hash: Optional[str]
+) -> List[Violation]:
+    """Process pool entry point for CppAnalyzer._run_rule_checks"""
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        # Skip __init__: the worker never talks to Ollama or the RAG store
+        _worker_analyzer = CppAnalyzer.__new__(CppAnalyzer)
+        _worker_analyzer._init_rule_checks()
+    return _worker_analyzer._run_rule_checks(file_content, style_guide, style_guide_hash)
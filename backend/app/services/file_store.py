@@ -0,0 +1,255 @@
+"""
+Storage backends for uploaded C++ files
+
+The in-memory store only works with a single server process. With several
+Uvicorn/Gunicorn workers an upload lands in one worker and the analyze request
+may be routed to another, so FILE_STORE_BACKEND=disk keeps files in a
+directory shared by every worker on the host instead.
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import json
+import os
+import uuid
+from app.models.core import FileInfo
+
+
+@dataclass(slots=True)
+class FileEntry:
+    """An uploaded file"""
+    id: str
+    name: str
+    path: str  # Full path with directory structure
+    size: int
+    content: bytes  # Raw bytes, decoded on read
+    content_hash: str
+
+    def to_info(self) -> FileInfo:
+        """File metadata as returned by the API"""
+        return FileInfo(id=self.id, file_name=self.name, file_path=self.path, file_size=self.size)
+
+
+class FileStore(ABC):
+    """Interface for uploaded file storage"""
+
+    @abstractmethod
+    def put(self, file_id: str, name: str, path: str, content: bytes, content_hash: str) -> FileEntry:
+        """Store a file and return its entry"""
+
+    @abstractmethod
+    def get(self, file_id: str) -> Optional[FileEntry]:
+        """Look up a file by ID"""
+
+    @abstractmethod
+    def delete(self, file_id: str) -> bool:
+        """Delete a file, returning False if it doesn't exist"""
+
+    @abstractmethod
+    def list(self) -> List[FileInfo]:
+        """Metadata for all stored files, oldest first"""
+
+    @property
+    @abstractmethod
+    def revision(self) -> int:
+        """Changes whenever files are added or removed"""
+
+
+class MemoryFileStore(FileStore):
+    """Files held in this process, least recently used evicted beyond a byte budget"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._files: "OrderedDict[str, FileEntry]" = OrderedDict()
+        self._revision = 0
+
+        # Identical uploads share one content buffer, freed when its last file is deleted
+        self._content_by_hash: Dict[str, bytes] = {}
+        self._content_refs: Dict[str, int] = {}
+        self._stored_bytes = 0
+
+    def put(self, file_id: str, name: str, path: str, content: bytes, content_hash: str) -> FileEntry:
+        # Reuse the stored buffer if this content was uploaded before
+        self._acquire_content(content_hash, content)
+        entry = FileEntry(
+            id=file_id,
+            name=name,
+            path=path,
+            size=len(content),
+            content=self._content_by_hash[content_hash],
+            content_hash=content_hash
+        )
+        self._files[file_id] = entry
+        self._revision += 1
+        self._evict_if_needed()
+        return entry
+
+    def get(self, file_id: str) -> Optional[FileEntry]:
+        entry = self._files.get(file_id)
+        if entry is not None:
+            self._files.move_to_end(file_id)
+        return entry
+
+    def delete(self, file_id: str) -> bool:
+        entry = self._files.pop(file_id, None)
+        if entry is None:
+            return False
+        self._release_content(entry.content_hash)
+        self._revision += 1
+        return True
+
+    def list(self) -> List[FileInfo]:
+        return [entry.to_info() for entry in self._files.values()]
+
+    @property
+    def revision(self) -> int:
+        return self._revision
+
+    def _acquire_content(self, content_hash: str, content: bytes) -> None:
+        """Add a reference to stored content, storing it if new"""
+        if content_hash not in self._content_by_hash:
+            self._content_by_hash[content_hash] = content
+            self._stored_bytes += len(content)
+        self._content_refs[content_hash] = self._content_refs.get(content_hash, 0) + 1
+
+    def _release_content(self, content_hash: str) -> None:
+        """Drop a reference to stored content, freeing it with the last one"""
+        self._content_refs[content_hash] -= 1
+        if self._content_refs[content_hash] == 0:
+            del self._content_refs[content_hash]
+            self._stored_bytes -= len(self._content_by_hash.pop(content_hash))
+
+    def _evict_if_needed(self) -> None:
+        """
+        Evict least recently used files until stored content fits the budget
+
+        The newest file is never evicted. An analysis already running keeps its
+        own reference to the content, so evicting its file doesn't affect it.
+        """
+        while self._stored_bytes > self.max_bytes and len(self._files) > 1:
+            _, entry = self._files.popitem(last=False)
+            self._release_content(entry.content_hash)
+            self._revision += 1
+
+
+class DiskFileStore(FileStore):
+    """
+    Files kept in a directory shared by all worker processes
+
+    Each file is stored as {id}.bin with its metadata in {id}.json. The
+    metadata is written last via an atomic rename, so other workers never
+    see a partially written file.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def put(self, file_id: str, name: str, path: str, content: bytes, content_hash: str) -> FileEntry:
+        entry = FileEntry(
+            id=file_id,
+            name=name,
+            path=path,
+            size=len(content),
+            content=content,
+            content_hash=content_hash
+        )
+        meta = {"name": name, "path": path, "size": entry.size, "content_hash": content_hash}
+
+        self._write_atomic(self._content_path(file_id), content)
+        self._write_atomic(self._meta_path(file_id), json.dumps(meta).encode("utf-8"))
+        return entry
+
+    def get(self, file_id: str) -> Optional[FileEntry]:
+        if not _is_file_id(file_id):
+            return None
+
+        meta = self._read_meta(file_id)
+        if meta is None:
+            return None
+
+        try:
+            with open(self._content_path(file_id), "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None  # Deleted by another worker in the meantime
+
+        return FileEntry(id=file_id, content=content, **meta)
+
+    def delete(self, file_id: str) -> bool:
+        if not _is_file_id(file_id):
+            return False
+
+        try:
+            os.remove(self._meta_path(file_id))
+        except FileNotFoundError:
+            return False
+
+        try:
+            os.remove(self._content_path(file_id))
+        except FileNotFoundError:
+            pass
+        return True
+
+    def list(self) -> List[FileInfo]:
+        metas = []
+        with os.scandir(self.root) as it:
+            for dir_entry in it:
+                if not dir_entry.name.endswith(".json"):
+                    continue
+                file_id = dir_entry.name[:-len(".json")]
+                meta = self._read_meta(file_id)
+                if meta is not None:
+                    metas.append((dir_entry.stat().st_mtime_ns, file_id, meta))
+
+        metas.sort(key=lambda item: item[0])
+        return [
+            FileInfo(id=file_id, file_name=meta["name"], file_path=meta["path"], file_size=meta["size"])
+            for _, file_id, meta in metas
+        ]
+
+    @property
+    def revision(self) -> int:
+        # Adding or removing a file updates the directory's mtime, in any worker
+        return os.stat(self.root).st_mtime_ns
+
+    def _meta_path(self, file_id: str) -> str:
+        return os.path.join(self.root, f"{file_id}.json")
+
+    def _content_path(self, file_id: str) -> str:
+        return os.path.join(self.root, f"{file_id}.bin")
+
+    def _read_meta(self, file_id: str) -> Optional[dict]:
+        try:
+            with open(self._meta_path(file_id), "rb") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+def _is_file_id(file_id: str) -> bool:
+    """Whether file_id is an ID we issued (a UUID), and so safe to use in a path"""
+    try:
+        return str(uuid.UUID(file_id)) == file_id
+    except ValueError:
+        return False
+
+
+def create_file_store() -> FileStore:
+    """Build the file store selected by FILE_STORE_BACKEND"""
+    backend = os.getenv("FILE_STORE_BACKEND", "memory").lower()
+
+    if backend == "memory":
+        return MemoryFileStore(max_bytes=int(os.getenv("MAX_UPLOAD_STORAGE_MB", "512")) * 1024 * 1024)
+    if backend == "disk":
+        return DiskFileStore(root=os.getenv("FILE_STORE_PATH", "./uploaded_files"))
+
+    raise ValueError(f"Unknown FILE_STORE_BACKEND: {backend}")
@@ -1,11 +1,75 @@
 """
 Ollama LLM integration service for C++ code analysis
 """
+import asyncio
+import logging
 import os
 import json
-from typing import Optional, Dict, Any, List
+import time
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
 import ollama
 
+logger = logging.getLogger(__name__)
+
+# Chat requests in flight at once. Matches the Ollama server's own
+# OLLAMA_NUM_PARALLEL so requests wait here rather than in Ollama's queue,
+# where they would count against their HTTP timeout
+OLLAMA_NUM_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+
+
+class JsonObjectStream:
+    """
+    Pull complete top-level JSON objects out of text arriving in pieces
+
+    LLM output is a JSON array of issue objects, possibly wrapped in a
+    markdown fence. Each object is decoded as soon as its closing brace
+    arrives, so issues can be used before the whole response is in.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0  # Next character of _buffer to scan
+        self._start = -1  # Where the current top-level object began
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> List[Any]:
+        """Add text and return the objects it completed"""
+        self._buffer += text
+        objects = []
+        buffer = self._buffer
+        for i in range(self._pos, len(buffer)):
+            ch = buffer[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = self._depth > 0
+            elif ch == "{":
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif ch == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        objects.append(json.loads(buffer[self._start:i + 1]))
+                    except ValueError:
+                        pass  # Skip a malformed object, keep the rest
+        self._pos = len(buffer)
+
+        # Drop text that can't be part of an object still to come
+        keep = self._start if self._depth > 0 else self._pos
+        self._buffer = buffer[keep:]
+        self._pos -= keep
+        self._start -= keep
+        return objects
+
 
 class OllamaService:
     """Service for interacting with Ollama and CodeLlama"""
@@ -13,24 +77,27 @@ class OllamaService:
     def __init__(self):
         self.host = os.getenv("OLLAMA_HOST", "http://localhost:11434")
         self.model = os.getenv("OLLAMA_MODEL", "codellama:7b")
-        self.client = ollama.Client(host=self.host)
+        # Async client keeps one pooled HTTP connection set for all requests and
+        # doesn't block the event loop, so analyses of several files overlap
+        self.client = ollama.AsyncClient(host=self.host)
+        self._chat_slots = asyncio.Semaphore(OLLAMA_NUM_PARALLEL)
 
     async def check_connection(self) -> bool:
         """Check if Ollama is running and accessible"""
         try:
-            self.client.list()
+            await self.client.list()
             return True
         except Exception as e:
-            print(f"Ollama connection error: {e}")
+            logger.error("Ollama connection error: %s", e)
             return False
 
     async def check_model(self) -> bool:
         """Check if CodeLlama model is available"""
         try:
-            models = self.client.list()
+            models = await self.client.list()
             return any(self.model in m['name'] for m in models['models'])
         except Exception as e:
-            print(f"Error checking model availability: {e}")
+            logger.error("Error checking model availability: %s", e)
             return False
 
     async def analyze_code(
@@ -51,47 +118,41 @@ class OllamaService:
             List of Violation objects
         """
         try:
-            import time
-            start_time = time.time()
-
-            print(f"  -> Building analysis prompt...")
-            print(f"    Code length: {len(code)} chars")
-            print(f"    Style guide length: {len(style_guide)} chars")
-            if context:
-                print(f"    RAG context length: {len(context)} chars")
+            start_time = time.perf_counter()
 
             prompt = self._build_analysis_prompt(code, style_guide, context)
-            print(f"    Total prompt length: {len(prompt)} chars")
+            logger.debug(
+                "Prompt: %d chars (code %d, style guide %d, RAG context %d)",
+                len(prompt), len(code), len(style_guide), len(context) if context else 0
+            )
 
             # Call Ollama with the prompt
-            print(f"  -> Sending request to Ollama ({self.model})...")
-            print(f"    Host: {self.host}")
-
-            response = self.client.chat(
-                model=self.model,
-                messages=[
-                    {
-                        'role': 'user',
-                        'content': prompt
+            logger.info("Sending request to Ollama (%s at %s)", self.model, self.host)
+
+            async with self._chat_slots:
+                response = await self.client.chat(
+                    model=self.model,
+                    messages=[
+                        {
+                            'role': 'user',
+                            'content': prompt
+                        }
+                    ],
+                    options={
+                        'temperature': 0.1,  # Low temperature for consistent analysis
+                        'num_predict': 2000  # Allow enough tokens for detailed analysis
                     }
-                ],
-                options={
-                    'temperature': 0.1,  # Low temperature for consistent analysis
-                    'num_predict': 2000  # Allow enough tokens for detailed analysis
-                }
-            )
-
-            elapsed = time.time() - start_time
-            print(f"  -> Received response from Ollama ({elapsed:.1f}s)")
+                )
 
             # Extract the response content
             response_text = response['message']['content']
-            print(f"    Response length: {len(response_text)} chars")
 
             # Parse the JSON response
-            print(f"  -> Parsing LLM response...")
             violations = self._parse_llm_response(response_text)
-            print(f"    Parsed {len(violations)} violations")
+            logger.info(
+                "Received response from Ollama (%.1fs, %d chars, %d violations)",
+                time.perf_counter() - start_time, len(response_text), len(violations)
+            )
 
             return {
                 "violations": violations,
@@ -100,9 +161,7 @@ class OllamaService:
             }
 
         except Exception as e:
-            print(f"[ERROR] Error during code analysis: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error during code analysis: %s", e)
             return {
                 "violations": [],
                 "status": "error",
@@ -112,21 +171,7 @@ class OllamaService:
     def _parse_llm_response(self, response_text: str) -> List[Dict[str, Any]]:
         """Parse the LLM response and extract violations"""
         try:
-            # Try to find JSON in the response
-            # LLMs sometimes wrap JSON in markdown code blocks
-            if "```json" in response_text:
-                start = response_text.find("```json") + 7
-                end = response_text.find("```", start)
-                json_text = response_text[start:end].strip()
-            elif "```" in response_text:
-                start = response_text.find("```") + 3
-                end = response_text.find("```", start)
-                json_text = response_text[start:end].strip()
-            else:
-                json_text = response_text.strip()
-
-            # Parse JSON
-            data = json.loads(json_text)
+            data = self._extract_json(response_text)
 
             # Handle different JSON structures
             if isinstance(data, list):
@@ -136,24 +181,39 @@ class OllamaService:
             else:
                 violations = []
 
-            # Normalize violation structure
-            normalized = []
-            for v in violations:
-                normalized.append({
-                    "type": v.get("type", "style_violation"),
-                    "severity": v.get("severity", "WARNING").upper(),
-                    "line_number": int(v.get("line_number", v.get("line", 1))),
-                    "description": v.get("description", "Style violation detected"),
-                    "rule_reference": v.get("rule_reference", v.get("reference", ""))
-                })
-
-            return normalized
+            return [self._normalize_violation(v) for v in violations]
 
         except Exception as e:
-            print(f"Error parsing LLM response: {e}")
-            print(f"Response text: {response_text[:500]}")  # Log first 500 chars
+            logger.error("Error parsing LLM response: %s", e)
+            logger.debug("Response text: %s", response_text[:500])  # Log first 500 chars
             return []
 
+    def _extract_json(self, response_text: str) -> Any:
+        """Decode the JSON in an LLM response"""
+        # LLMs sometimes wrap JSON in markdown code blocks
+        if "```json" in response_text:
+            start = response_text.find("```json") + 7
+            end = response_text.find("```", start)
+            json_text = response_text[start:end].strip()
+        elif "```" in response_text:
+            start = response_text.find("```") + 3
+            end = response_text.find("```", start)
+            json_text = response_text[start:end].strip()
+        else:
+            json_text = response_text.strip()
+
+        return json.loads(json_text)
+
+    def _normalize_violation(self, v: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalize violation structure"""
+        return {
+            "type": v.get("type", "style_violation"),
+            "severity": v.get("severity", "WARNING").upper(),
+            "line_number": int(v.get("line_number", v.get("line", 1))),
+            "description": v.get("description", "Style violation detected"),
+            "rule_reference": v.get("rule_reference", v.get("reference", ""))
+        }
+
     def _build_analysis_prompt(
         self,
         code: str,
@@ -241,13 +301,36 @@ Only return valid JSON. No explanations, no markdown, just the JSON array."""
             Dictionary containing comment quality issues
         """
         try:
-            # Add line numbers to code
-            numbered_lines = []
-            for i, line in enumerate(code.split('\n'), 1):
-                numbered_lines.append(f"{i:4d} | {line}")
-            numbered_code = '\n'.join(numbered_lines)
+            violations = [v async for v in self.stream_comment_quality(code)]
 
-            prompt = f"""You are checking comment quality in C++ code. This is a SIMPLE task.
+            return {
+                "violations": violations,
+                "status": "success"
+            }
+
+        except Exception as e:
+            logger.error("Error during comment quality check: %s", e)
+            return {
+                "violations": [],
+                "status": "error",
+                "error": str(e)
+            }
+
+    async def stream_comment_quality(self, code: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Comment quality check that yields each issue as the model writes it.
+
+        The response is streamed from Ollama and every issue object is
+        normalized and yielded once its JSON is complete, without waiting for
+        the rest of the response. Errors are raised to the caller.
+
+        Args:
+            code: C++ source code to analyze
+        """
+        # Add line numbers to code
+        numbered_code = self._number_lines(code)
+
+        prompt = f"""You are checking comment quality in C++ code. This is a SIMPLE task.
 
 CODE WITH LINE NUMBERS:
 {numbered_code}
@@ -278,24 +361,111 @@ OUTPUT FORMAT (JSON array only, no other text):
 
 Only return valid JSON. If no issues, return: []"""
 
-            response = self.client.chat(
+        # The slot is held until the stream ends, since Ollama is busy until then
+        async with self._chat_slots:
+            stream = await self.client.chat(
                 model=self.model,
                 messages=[{'role': 'user', 'content': prompt}],
-                options={'temperature': 0.1, 'num_predict': 500}
+                options={'temperature': 0.1, 'num_predict': 500},
+                stream=True
             )
 
-            response_text = response['message']['content']
-            violations = self._parse_llm_response(response_text)
+            objects = JsonObjectStream()
+            async for chunk in stream:
+                for data in objects.feed(chunk['message']['content']):
+                    # Same shapes as _parse_llm_response: issue objects, or one
+                    # object wrapping them in "violations"
+                    issues = data.get('violations', [data]) if isinstance(data, dict) else []
+                    for v in issues:
+                        try:
+                            yield self._normalize_violation(v)
+                        except (AttributeError, TypeError, ValueError) as e:
+                            logger.warning("Skipping malformed LLM issue %r: %s", v, e)
+
+    async def check_comment_quality_batch(self, files: List[Tuple[str, str]]) -> Dict[str, Any]:
+        """
+        Comment quality check for several small files in a single request.
+
+        Sending small files together saves a round trip and prompt overhead
+        per file. Each file is a numbered section and every reported issue
+        carries the number of the file it belongs to.
+
+        Args:
+            files: (file_name, code) pairs
+
+        Returns:
+            Dictionary with one violation list per input file, in order
+        """
+        try:
+            sections = []
+            for index, (file_name, code) in enumerate(files, 1):
+                sections.append(f"===FILE {index}: {file_name}===\n{self._number_lines(code)}")
+            all_code = '\n\n'.join(sections)
+
+            prompt = f"""You are checking comment quality in {len(files)} C++ files. This is a SIMPLE task.
+
+Each file starts with a line like ===FILE 2: name.cpp=== followed by its code with line numbers.
+
+{all_code}
+
+TASK: Find comments that are NOT descriptive or useful.
+
+ONLY report comments that are:
+1. Too vague (e.g., "// x" or "// temp")
+2. Completely unhelpful (e.g., "// code" or "// function")
+3. Obvious/redundant (e.g., "// increment i" for i++)
+
+DO NOT report:
+- Missing comments (handled separately)
+- Code issues (only check comments)
+
+If ALL comments are adequately descriptive, return: []
+
+OUTPUT FORMAT (one JSON array for all files, no other text). "file" is the
+file number and "line_number" is the line number within that file:
+[
+  {{
+    "file": 1,
+    "type": "poor_comment_quality",
+    "severity": "MINOR",
+    "line_number": 5,
+    "description": "Comment is too vague",
+    "rule_reference": "Code Documentation"
+  }}
+]
+
+Only return valid JSON. If no issues, return: []"""
+
+            async with self._chat_slots:
+                response = await self.client.chat(
+                    model=self.model,
+                    messages=[{'role': 'user', 'content': prompt}],
+                    options={'temperature': 0.1, 'num_predict': 500 * len(files)}
+                )
+
+            data = self._extract_json(response['message']['content'])
+            if not isinstance(data, list):
+                raise ValueError("Expected a JSON array of issues")
+
+            results: List[List[Dict[str, Any]]] = [[] for _ in files]
+            for v in data:
+                index = int(v.get("file", 0)) - 1
+                if 0 <= index < len(files):
+                    results[index].append(self._normalize_violation(v))
 
             return {
-                "violations": violations,
+                "results": results,
                 "status": "success"
             }
 
         except Exception as e:
-            print(f"[ERROR] Error during comment quality check: {e}")
+            logger.error("Error during batched comment quality check: %s", e)
             return {
-                "violations": [],
+                "results": [],
                 "status": "error",
                 "error": str(e)
             }
+
+    def _number_lines(self, code: str) -> str:
+        """Prefix each line of code with its line number"""
+        return '\n'.join(f"{i:4d} | {line}" for i, line in enumerate(code.split('\n'), 1))
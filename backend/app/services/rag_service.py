@@ -2,11 +2,19 @@
 RAG (Retrieval-Augmented Generation) service for context-aware analysis
 """
 from typing import List, Optional, Dict, Any
+from functools import lru_cache
+import logging
 import os
 import uuid
 import chromadb
 from chromadb.config import Settings
 from sentence_transformers import SentenceTransformer
+from app.utils.hashing import content_hash
+
+logger = logging.getLogger(__name__)
+
+# Lines repeated at the start of each chunk from the end of the previous one
+CHUNK_OVERLAP_LINES = 3
 
 
 class RAGService:
@@ -25,6 +33,13 @@ class RAGService:
         self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
         self.collection = self._get_or_create_collection()
 
+        # Full document text lives on disk next to the vector DB; recently
+        # used documents are kept decoded, with their hash, in a small cache
+        # keyed by the documents directory's revision
+        self.documents_path = os.path.join(self.rag_data_path, "documents")
+        os.makedirs(self.documents_path, exist_ok=True)
+        self._document_cache = lru_cache(maxsize=32)(self._load_document)
+
     def _get_or_create_collection(self):
         """Get or create ChromaDB collection"""
         return self.chroma_client.get_or_create_collection(
@@ -51,27 +66,19 @@ class RAGService:
         """
         # Generate unique document ID
         doc_id = str(uuid.uuid4())
-        print(f"\n{'='*60}")
-        print(f"Adding document to RAG database")
-        print(f"Document ID: {doc_id}")
-        print(f"Type: {doc_type}")
-        print(f"Content length: {len(content)} chars")
-        if metadata:
-            print(f"Metadata: {metadata}")
-        print(f"{'='*60}\n")
+        logger.info(
+            "Adding document %s to RAG database (%s, %d chars, metadata %s)",
+            doc_id, doc_type, len(content), metadata
+        )
 
         # Chunk the document
-        print(f"Step 1: Chunking document...")
         chunks = self._chunk_document(content)
-        print(f"[OK] Created {len(chunks)} chunks")
 
         # Generate embeddings for each chunk
-        print(f"Step 2: Generating embeddings...")
         embeddings = self.embedder.encode(chunks).tolist()
-        print(f"[OK] Generated {len(embeddings)} embeddings")
+        logger.debug("Embedded %d chunks", len(chunks))
 
         # Prepare metadata for each chunk
-        print(f"Step 3: Preparing metadata...")
         chunk_ids = [f"{doc_id}_chunk_{i}" for i in range(len(chunks))]
         chunk_metadata = []
         for i in range(len(chunks)):
@@ -86,7 +93,6 @@ class RAGService:
             chunk_metadata.append(meta)
 
         # Add to ChromaDB
-        print(f"Step 4: Storing in ChromaDB...")
         self.collection.add(
             ids=chunk_ids,
             embeddings=embeddings,
@@ -94,10 +100,101 @@ class RAGService:
             metadatas=chunk_metadata
         )
 
-        print(f"[OK] Successfully added document {doc_id} to RAG database")
-        print(f"{'='*60}\n")
+        # Keep the full text for retrieval by ID
+        with open(self._document_file(doc_id), "wb") as f:
+            f.write(content.encode("utf-8"))
+
+        logger.info("[OK] Added document %s with %d chunks", doc_id, len(chunks))
         return doc_id
 
+    def get_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a stored document by ID
+
+        Returns:
+            Dict with id, filename, type, content_hash and content, or None
+            if not found. The dict is cached and shared by every caller, so
+            the text is decoded and hashed once per document, not per request.
+        """
+        # Misses and failures raise out of the cached loader, so only found
+        # documents are cached and a failed load is retried next time.
+        # The revision is read before loading, so a document deleted while
+        # it loads is cached under a revision that is already stale.
+        try:
+            return self._document_cache(doc_id, self._documents_revision())
+        except KeyError:
+            return None
+        except Exception as e:
+            logger.error("Error loading document %s: %s", doc_id, e)
+            return None
+
+    def _documents_revision(self) -> int:
+        """Changes whenever a stored text is added or removed, in any worker"""
+        return os.stat(self.documents_path).st_mtime_ns
+
+    def _load_document(self, doc_id: str, revision: int) -> Dict[str, Any]:
+        """
+        Load document metadata from ChromaDB and its full text from disk
+
+        revision only keys the cache. Raises KeyError if there is no such
+        document.
+        """
+        results = self.collection.get(ids=[f"{doc_id}_chunk_0"], include=["metadatas"])
+        if not results or not results.get('metadatas'):
+            raise KeyError(doc_id)
+
+        try:
+            with open(self._document_file(doc_id), "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            # Added before full texts were stored on disk
+            raw = self._rebuild_document_file(doc_id)
+
+        metadata = results['metadatas'][0]
+        return {
+            'id': doc_id,
+            'filename': metadata.get('filename', 'unknown'),
+            'type': metadata.get('doc_type', 'unknown'),
+            'content_hash': content_hash(raw),
+            'content': raw.decode("utf-8")
+        }
+
+    def _document_file(self, doc_id: str) -> str:
+        """Path of the stored full text for a document"""
+        return os.path.join(self.documents_path, f"{doc_id}.txt")
+
+    def _rebuild_document_file(self, doc_id: str) -> bytes:
+        """
+        Reassemble a document's full text from its chunks and store it
+
+        Once stored, deleting the document removes the file like any other,
+        which is what tells the other workers to drop their cached copy.
+        """
+        results = self.collection.get(where={"doc_id": doc_id}, include=["documents", "metadatas"])
+        chunks = sorted(
+            zip(results['metadatas'], results['documents']),
+            key=lambda item: item[0].get('chunk_index', 0)
+        )
+
+        lines: List[str] = []
+        prev_size = 0
+        for _, chunk in chunks:
+            chunk_lines = chunk.split('\n')
+            # Skip the lines repeated from the previous chunk
+            lines.extend(chunk_lines[min(CHUNK_OVERLAP_LINES, prev_size):])
+            prev_size = len(chunk_lines)
+        raw = '\n'.join(lines).encode("utf-8")
+
+        tmp_path = f"{self._document_file(doc_id)}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(raw)
+            os.replace(tmp_path, self._document_file(doc_id))
+            logger.info("Rebuilt stored text for %s from %d chunks", doc_id, len(chunks))
+        except OSError as e:
+            logger.warning("Could not store rebuilt text for %s: %s", doc_id, e)
+        return raw
+
     def _chunk_document(self, content: str) -> List[str]:
         """
         Split document into overlapping chunks
@@ -121,7 +218,7 @@ class RAGService:
                 chunks.append('\n'.join(current_chunk))
 
                 # Start new chunk with overlap
-                overlap_lines = current_chunk[-3:]  # Keep last 3 lines for overlap
+                overlap_lines = current_chunk[-CHUNK_OVERLAP_LINES:]
                 current_chunk = overlap_lines + [line]
                 current_size = sum(len(l) for l in current_chunk)
             else:
@@ -150,16 +247,12 @@ class RAGService:
             List of relevant text chunks
         """
         try:
-            print(f"  -> Searching RAG database...")
-            print(f"    Query length: {len(query)} chars")
-            print(f"    Requesting top {top_k} results")
+            logger.debug("Searching RAG database (query %d chars, top %d)", len(query), top_k)
 
             # Generate query embedding
-            print(f"  -> Generating query embedding...")
             query_embedding = self.embedder.encode([query])[0].tolist()
 
             # Search ChromaDB
-            print(f"  -> Querying ChromaDB collection...")
             results = self.collection.query(
                 query_embeddings=[query_embedding],
                 n_results=top_k
@@ -168,16 +261,14 @@ class RAGService:
             # Extract and return document texts
             if results and 'documents' in results and len(results['documents']) > 0:
                 found_docs = results['documents'][0]
-                print(f"    Found {len(found_docs)} relevant chunks")
+                logger.debug("Found %d relevant chunks", len(found_docs))
                 return found_docs  # First query's results
 
-            print(f"    No documents found in RAG database")
+            logger.debug("No documents found in RAG database")
             return []
 
         except Exception as e:
-            print(f"[ERROR] Error searching for context: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error searching for context: %s", e)
             return []
 
     def delete_document(self, doc_id: str) -> bool:
@@ -191,20 +282,28 @@ class RAGService:
             if results and 'ids' in results and len(results['ids']) > 0:
                 # Delete all chunks
                 self.collection.delete(ids=results['ids'])
-                print(f"Deleted document {doc_id} with {len(results['ids'])} chunks")
+                logger.info("Deleted document %s with %d chunks", doc_id, len(results['ids']))
+
+                # Removing the stored text changes the documents revision,
+                # so every worker's cached copy goes stale
+                try:
+                    os.remove(self._document_file(doc_id))
+                except OSError as e:
+                    # Already gone, e.g. removed by another worker
+                    logger.warning("Could not remove stored text for %s: %s", doc_id, e)
                 return True
 
             return False
 
         except Exception as e:
-            print(f"Error deleting document: {e}")
+            logger.error("Error deleting document: %s", e)
             return False
 
     def list_documents(self) -> List[Dict[str, Any]]:
         """List all documents in knowledge base"""
         try:
-            # Get all items from collection
-            results = self.collection.get()
+            # Every document has exactly one first chunk
+            results = self.collection.get(where={"chunk_index": 0}, include=["metadatas"])
 
             if not results or 'metadatas' not in results:
                 return []
@@ -224,5 +323,5 @@ class RAGService:
             return list(docs_dict.values())
 
         except Exception as e:
-            print(f"Error listing documents: {e}")
+            logger.error("Error listing documents: %s", e)
             return []
@@ -0,0 +1,17 @@
+"""
+Content fingerprinting helpers
+"""
+import hashlib
+
+# 128-bit blake2b digests are plenty for cache keys and deduplication
+DIGEST_SIZE = 16
+
+
+def new_hasher() -> "hashlib._Hash":
+    """Incremental hasher for content fingerprints"""
+    return hashlib.blake2b(digest_size=DIGEST_SIZE)
+
+
+def content_hash(data: bytes) -> str:
+    """Fingerprint of a complete buffer"""
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).hexdigest()
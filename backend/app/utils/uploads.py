@@ -0,0 +1,53 @@
+"""
+Helpers for reading uploaded files
+"""
+import codecs
+import io
+import os
+from typing import Any, Optional
+from fastapi import HTTPException, UploadFile
+
+# Read uploads in fixed-size chunks so oversized files are rejected early
+UPLOAD_CHUNK_SIZE = 64 * 1024
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_FILE_SIZE_MB", "10")) * 1024 * 1024
+
+
+async def read_upload(
+    file: UploadFile,
+    max_size: int = MAX_UPLOAD_SIZE,
+    hasher: Optional[Any] = None
+) -> bytes:
+    """
+    Read an uploaded file chunk by chunk, enforcing a size limit
+
+    Aborts with HTTP 413 as soon as the running byte count exceeds max_size,
+    so an oversized upload is never buffered in full. Each chunk is also fed
+    through an incremental UTF-8 decoder so malformed text is rejected with
+    HTTP 400 without keeping a decoded copy around. If a hasher is given it
+    is updated with every chunk, so the content is fingerprinted in the same
+    pass.
+    """
+    buffer = io.BytesIO()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    received = 0
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        received += len(chunk)
+        if received > max_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File size exceeds {max_size // (1024 * 1024)}MB limit"
+            )
+        _validate_utf8(decoder, chunk)
+        if hasher is not None:
+            hasher.update(chunk)
+        buffer.write(chunk)
+    _validate_utf8(decoder, b"", final=True)
+    return buffer.getvalue()
+
+
+def _validate_utf8(decoder: codecs.IncrementalDecoder, chunk: bytes, final: bool = False) -> None:
+    """Feed a chunk through the decoder, discarding the text"""
+    try:
+        decoder.decode(chunk, final=final)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded text")
@@ -42,6 +42,12 @@ const ViolationPanel: React.FC<ViolationPanelProps> = ({ analysisResult }) => {
     );
   }
 
+  // Severity totals are computed here; /analyze only sends them with include_stats
+  const severityCounts = analysisResult.violations.reduce<Record<string, number>>((counts, violation) => {
+    counts[violation.severity] = (counts[violation.severity] || 0) + 1;
+    return counts;
+  }, {});
+
   return (
     <div className="flex flex-col h-full">
       {/* Header with Statistics */}
@@ -62,7 +68,7 @@ const ViolationPanel: React.FC<ViolationPanelProps> = ({ analysisResult }) => {
               <span>Critical</span>
             </div>
             <span className="font-semibold">
-              {analysisResult.violations_by_severity[ViolationSeverity.CRITICAL] || 0}
+              {severityCounts[ViolationSeverity.CRITICAL] || 0}
             </span>
           </div>
           <div className="flex items-center justify-between text-sm">
@@ -71,7 +77,7 @@ const ViolationPanel: React.FC<ViolationPanelProps> = ({ analysisResult }) => {
               <span>Warning</span>
             </div>
             <span className="font-semibold">
-              {analysisResult.violations_by_severity[ViolationSeverity.WARNING] || 0}
+              {severityCounts[ViolationSeverity.WARNING] || 0}
             </span>
           </div>
           <div className="flex items-center justify-between text-sm">
@@ -80,7 +86,7 @@ const ViolationPanel: React.FC<ViolationPanelProps> = ({ analysisResult }) => {
               <span>Minor</span>
             </div>
             <span className="font-semibold">
-              {analysisResult.violations_by_severity[ViolationSeverity.MINOR] || 0}
+              {severityCounts[ViolationSeverity.MINOR] || 0}
             </span>
           </div>
         </div>
@@ -28,6 +28,10 @@ export interface AnalysisResult {
   violations_by_type: Record<string, number>;
   status: string;
   error_message?: string;
+  metrics?: {
+    spans: Record<string, number>;  // Phase timings in milliseconds
+    cached?: boolean;
+  };
 }
 
 export interface UploadedFile {